@@ -1,8 +1,15 @@
 import math
 import heapq
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from pyswarms.backend.operators import compute_objective_function, compute_pbest
 from pyswarms.single import GlobalBestPSO
-from utils.math_utils import point_on_land, segment_intersects_any_polygon
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from utils.math_utils import point_on_land, polygon_edges, segments_intersect_edges
 from collections import defaultdict
 from math import inf
 
@@ -20,15 +27,53 @@ def path_indices_to_xy(path_idxs, all_nodes):
     return coords
 
 
+def visible_pairs(nodes, edges, R, skip=0):
+    """
+    {(i, j): distance} for i < j, for the node pairs within R of each other whose
+    straight segment crosses none of the coastline `edges` (from polygon_edges).
+    Pairs among the first `skip` nodes are left out. Every candidate segment is
+    tested in one call to segments_intersect_edges.
+    """
+    pairs, distances = [], []
+    for i in range(len(nodes)):
+        for j in range(max(i+1, skip), len(nodes)):
+            x1, y1 = nodes[i]
+            x2, y2 = nodes[j]
+            d = math.hypot(x1 - x2, y1 - y2)  # Euclidean distance
+            if d <= R:
+                pairs.append((i, j))
+                distances.append(d)
+    if not pairs:
+        return {}
+    xy = np.asarray(nodes, dtype=float)
+    ends = np.array(pairs)
+    crosses = segments_intersect_edges(xy[ends[:, 0]], xy[ends[:, 1]], *edges)
+    return {pair: d for pair, d, land in zip(pairs, distances, crosses.tolist()) if not land}
+
+
 def build_adjacency_layered(nodes, polygons, R, ports,
-                            alpha_water=1.0, alpha_highway=0.6, beta_switch=200.0):
+                            alpha_water=1.0, alpha_highway=0.6, beta_switch=200.0, port_edges=None, edges=None):
     """
     Build a 2-layer graph:
       - layer W (open water): index 0..N-1
       - layer H (highway):    index N..2N-1
     Switch edges connect i(W) <-> i(H) with cost beta_switch.
+    `port_edges`, visible_pairs of the ports alone, replaces the distance and land
+    tests for port-to-port pairs, so only pairs with a highway node are tested. `edges` are
+    polygon_edges(polygons), for callers that build many graphs on one map.
     """
-    N = len(nodes)
+    if edges is None:
+        edges = polygon_edges(polygons)
+    if port_edges is None:
+        visible = visible_pairs(nodes, edges, R)
+    else:
+        visible = dict(port_edges)
+        visible.update(visible_pairs(nodes, edges, R, skip=ports))
+    return layered_adjacency(visible, len(nodes), ports, alpha_water, alpha_highway, beta_switch)
+
+
+def layered_adjacency(visible, N, ports, alpha_water=1.0, alpha_highway=0.6, beta_switch=200.0):
+    """The adjacency lists and weights of build_adjacency_layered, from water edges as from visible_pairs"""
     adjacency_list = [[] for _ in range(2*N)]
     weights = {}
 
@@ -38,19 +83,14 @@ def build_adjacency_layered(nodes, polygons, R, ports,
         adjacency_list[v].append(u)
         weights[(v, u)] = cost
 
-    for i in range(N):
-        for j in range(i+1, N):
-            x1, y1 = nodes[i]
-            x2, y2 = nodes[j]
-            dx, dy = x1 - x2, y1 - y2
-            d = math.hypot(dx, dy)  # Euclidean distance
-            if d <= R and not segment_intersects_any_polygon((x1, y1), (x2, y2), polygons):
-                add(i, j, alpha_water * d)  # W -> W
+    for (i, j) in sorted(visible):  # same edge order as testing pairs row by row
+        d = visible[(i, j)]
+        add(i, j, alpha_water * d)  # W -> W
 
-                i_is_h = (i >= ports)
-                j_is_h = (j >= ports)
-                if i_is_h and j_is_h:  # ports not allowed on highway layer
-                    add(N + i, N + j, alpha_highway * d)  # H -> H
+        i_is_h = (i >= ports)
+        j_is_h = (j >= ports)
+        if i_is_h and j_is_h:  # ports not allowed on highway layer
+            add(N + i, N + j, alpha_highway * d)  # H -> H
 
     # Mode-switch (enter/exit highway)
     for i in range(N):
@@ -59,17 +99,40 @@ def build_adjacency_layered(nodes, polygons, R, ports,
     return adjacency_list, weights  # size 2N
 
 
+def layered_csgraph(visible, N, ports, alpha_water=1.0, alpha_highway=0.6, beta_switch=200.0):
+    """
+    The graph of build_adjacency_layered as a scipy.sparse CSR matrix with both
+    directions of every edge, for scipy.sparse.csgraph searches. `visible` holds
+    the water edges as from visible_pairs. Also returns the total highway length.
+    """
+    pairs = sorted(visible)
+    i = np.array([pair[0] for pair in pairs], dtype=np.int64)
+    j = np.array([pair[1] for pair in pairs], dtype=np.int64)
+    d = np.array([visible[pair] for pair in pairs], dtype=float)
+    highway = (i >= ports) & (j >= ports)  # ports not allowed on highway layer
+    switch = np.arange(N)
+    u = np.concatenate((i, N + i[highway], switch))
+    v = np.concatenate((j, N + j[highway], N + switch))
+    costs = np.concatenate((alpha_water * d, alpha_highway * d[highway], np.full(N, beta_switch, dtype=float)))
+
+    rows, cols, data = np.concatenate((u, v)), np.concatenate((v, u)), np.concatenate((costs, costs))
+    order = np.lexsort((cols, rows))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=2*N))))
+    graph = csr_matrix((data[order], cols[order], indptr), shape=(2*N, 2*N))
+
+    total_highway_length = 0.0
+    for cost_uv in (alpha_highway * d[highway]).tolist():
+        total_highway_length += cost_uv / alpha_highway
+    return graph, total_highway_length
+
+
 def build_adjacency(nodes, polygons, radius):
     n = len(nodes)
     adj = [[] for _ in range(n)]
-    for i in range(n):
-        for j in range(i + 1, n):
-            dx = nodes[i][0] - nodes[j][0]
-            dy = nodes[i][1] - nodes[j][1]
-            d = math.hypot(dx, dy)
-            if d <= radius and not segment_intersects_any_polygon(nodes[i], nodes[j], polygons):
-                adj[i].append((j, d))
-                adj[j].append((i, d))
+    visible = visible_pairs(nodes, polygon_edges(polygons), radius)
+    for (i, j) in sorted(visible):
+        adj[i].append((j, visible[(i, j)]))
+        adj[j].append((i, visible[(i, j)]))
     return adj
 
 
@@ -115,6 +178,11 @@ def dijkstra(graph, weight, s, t):
     return None, []
 
 
+# From this many orders on, the objective routes them with one csgraph search per origin port;
+# below it scipy's per-call overhead outweighs the saving, and one dict Dijkstra per order is faster
+CSGRAPH_MIN_ORDERS = 12
+
+
 def objective_factory(ports_xy, orders, coastlines, bbox_min, bbox_max, M, R, big_penalty, alpha_water, alpha_highway, beta_switch, lambda_infrastructure=0):
     '''
     Create cost function for PSO.
@@ -126,6 +194,11 @@ def objective_factory(ports_xy, orders, coastlines, bbox_min, bbox_max, M, R, bi
 
     ports_xy = np.array(ports_xy)  # shape (P,2)
     ports = ports_xy.shape[0]
+    edges = polygon_edges(coastlines)
+    port_edges = visible_pairs(ports_xy.tolist(), edges, R)  # fixed for the whole run
+    origins = sorted({origin_index for origin_index, _, _ in orders})
+    origin_row = {origin_index: row for row, origin_index in enumerate(origins)}
+    use_csgraph = len(orders) >= CSGRAPH_MIN_ORDERS
 
     def objective(X):
         # X shape: (n_particles, 2*M)
@@ -144,23 +217,32 @@ def objective_factory(ports_xy, orders, coastlines, bbox_min, bbox_max, M, R, bi
             N = len(nodes)
 
             # Graph building handles isolated nodes
-            adj, weights = build_adjacency_layered(nodes.tolist(), coastlines, R, ports, alpha_water, alpha_highway, beta_switch)
+            visible = dict(port_edges)
+            visible.update(visible_pairs(nodes.tolist(), edges, R, skip=ports))
+            if use_csgraph:
+                graph, total_highway_length = layered_csgraph(visible, N, ports, alpha_water, alpha_highway,
+                                                              beta_switch)
+                # One search per origin port covers all of its orders
+                distances = csgraph_dijkstra(graph, indices=origins).tolist()
+                order_distances = [distances[origin_row[origin_index]][destination_index]
+                                   for (origin_index, destination_index, _) in orders]
+            else:
+                adj, weights = layered_adjacency(visible, N, ports, alpha_water, alpha_highway, beta_switch)
+                order_distances = [dijkstra(adj, weights, origin_index, destination_index)[0]
+                                   for (origin_index, destination_index, _) in orders]
+                total_highway_length = 0.0
+                for (u, v), cost_uv in weights.items():
+                    if u >= N and v >= N and u < v:
+                        segment_length = cost_uv / alpha_highway
+                        total_highway_length += segment_length
 
             routing_cost = 0.0
-            for (origin_index, destination_index, weight) in orders:
-                shortest_path, _ = dijkstra(adj, weights, origin_index, destination_index)
-                if math.isinf(shortest_path):
+            for (_, _, weight), shortest_path in zip(orders, order_distances):
+                if shortest_path is None or math.isinf(shortest_path):  # no route between the ports
                     routing_cost += big_penalty
                 else:
                     routing_cost += weight * shortest_path
 
-            total_highway_length = 0.0
-
-            for (u, v), cost_uv in weights.items():
-                if u >= N and v >= N and u < v:
-                    segment_length = cost_uv / alpha_highway
-                    total_highway_length += segment_length
-
             infra_cost = lambda_infrastructure * total_highway_length
 
             costs[k] = routing_cost + penalty + infra_cost
@@ -168,39 +250,63 @@ def objective_factory(ports_xy, orders, coastlines, bbox_min, bbox_max, M, R, bi
     return objective
 
 
-def optimize_highways(ports_xy, orders, coastlines, bbox_min, bbox_max,
-                      M=6, R=250.0, iters=120, particles=60,
-                      c1=1.4, c2=1.6, w=0.7, big_penalty=1e7,
-                      alpha_water=1.0, alpha_highway=0.6, beta_switch=200.0, lambda_infrastructure=0.0):
+# Objective of an evaluation worker process, set once by _init_objective_worker
+_worker_objective = None
+
+
+def _init_objective_worker(objective_args):
+    """Pool initializer: build the objective, with its coastline and port data, in this process"""
+    global _worker_objective
+    _worker_objective = objective_factory(**objective_args)
+
+
+def _evaluate_particles(X):
+    return _worker_objective(X)
+
+
+# Particles times orders from which a run is worth a process pool; smaller runs are over before
+# the workers have started, and their iterations cost less than shipping the swarm back and forth
+POOL_MIN_WORK = 400
+
+
+def pool_workers(workers, particles, orders):
     """
-    Optiomize highway node positions using particle swarm optimization.
+    `workers` for optimize_highways if the run is big enough for a process pool to pay
+    off and there is more than one CPU to run it on, else 1 (evaluate in the calling thread).
+    """
+    if particles * len(orders) < POOL_MIN_WORK or (os.cpu_count() or 1) < 2:
+        return 1
+    return workers
 
-    Args:
-        M: number of highway nodes
-        R: connection radius
-        ports_xy: list[(x,y)]
-        orders: list[(origin_port_idx, dest_port_idx, weight)]
-        bbox_min/bbox_max: np.array([minx,miny]), np.array([maxx,maxy])
+
+def _pool_context():
     """
-    dimensions = 2*M
+    Start method for evaluation workers. They come from a fork server rather than a fork of
+    this process, which may be running pygame and other threads (main.py optimizes from a
+    background thread). The server imports this module once, so workers start ready to go.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
 
-    # below is because each highway node has seperate bounds (although they are the same)
-    lower = np.tile(bbox_min, M)
-    upper = np.tile(bbox_max, M)
-    bounds = (lower, upper)
 
-    cost_function = objective_factory(ports_xy, orders, coastlines, bbox_min, bbox_max, M, R, big_penalty,
-                                      alpha_water, alpha_highway, beta_switch, lambda_infrastructure)
+def pool_objective(pool, workers):
+    """Objective that splits the swarm into `workers` slices and evaluates them on `pool`"""
+    def objective(X):
+        slices = np.array_split(X, min(workers, X.shape[0]))
+        return np.concatenate(list(pool.map(_evaluate_particles, slices)))
+    return objective
 
-    optimizer = GlobalBestPSO(
-        n_particles=particles,
-        dimensions=dimensions,
-        options={'c1': c1, 'c2': c2, 'w': w},
-        bounds=bounds
-    )
-    verbose = True
-    best_cost, best_pos = optimizer.optimize(cost_function, iters=iters, verbose=verbose)
-    highway_nodes = best_pos.reshape(M, 2)
+
+def highway_layout(best_pos, ports_xy, orders, coastlines, M, R, alpha_water, alpha_highway, beta_switch):
+    """
+    What the UI draws for the highway positions `best_pos`:
+    (highway_nodes, edges, all_nodes, order_paths_xy), with the edges of the
+    single-layer graph and the route of each order through the layered one.
+    """
+    highway_nodes = np.asarray(best_pos).reshape(M, 2)
 
     all_nodes = np.vstack([np.array(ports_xy), highway_nodes])
     P = len(ports_xy)
@@ -221,4 +327,119 @@ def optimize_highways(ports_xy, orders, coastlines, bbox_min, bbox_max,
         dist, path = dijkstra(adj_layered, weights, origin_idx, dest_idx)
         order_paths_xy.append(path_indices_to_xy(path, all_nodes))
 
+    return highway_nodes, edges, all_nodes, order_paths_xy
+
+
+def warm_start_swarm(init_nodes, particles, bounds, spread=40.0, explore=0.25):
+    """
+    Initial swarm positions seeded from earlier highway nodes: one particle on
+    them, most scattered around them with `spread` px standard deviation, and an
+    `explore` fraction spread uniformly over the bounds so the swarm can still
+    move away from a poor start.
+    """
+    lower, upper = bounds
+    centre = np.asarray(init_nodes, dtype=float).reshape(-1)
+    n_uniform = int(particles * explore)
+    around = centre + np.random.normal(0.0, spread, (particles - n_uniform, len(centre)))
+    around[0] = centre
+    uniform = np.random.uniform(lower, upper, (n_uniform, len(centre)))
+    return np.clip(np.vstack((around, uniform)), lower, upper)
+
+
+def optimize_highways(ports_xy, orders, coastlines, bbox_min, bbox_max,
+                      M=6, R=250.0, iters=120, particles=60,
+                      c1=1.4, c2=1.6, w=0.7, big_penalty=1e7,
+                      alpha_water=1.0, alpha_highway=0.6, beta_switch=200.0, lambda_infrastructure=0.0,
+                      workers=0, patience=None, cancel_event=None, progress=None, init_nodes=None, init_spread=40.0):
+    """
+    Optiomize highway node positions using particle swarm optimization.
+
+    Args:
+        M: number of highway nodes
+        R: connection radius
+        ports_xy: list[(x,y)]
+        orders: list[(origin_port_idx, dest_port_idx, weight)]
+        bbox_min/bbox_max: np.array([minx,miny]), np.array([maxx,maxy])
+        workers: evaluate the particles in this many processes. The map and ports are
+            sent to each process once, at the start of the run. 0 or 1 evaluates them
+            in the calling thread, which is faster for small swarms and few orders;
+            pool_workers picks between the two.
+        patience: stop once the best cost hasn't improved for this many iterations
+            (None runs all `iters`).
+        cancel_event: threading.Event checked after every iteration; when set, the
+            run stops and returns the best layout found so far.
+        progress: called after every iteration with a dict of iteration, iters,
+            best_cost, evals_per_sec and layout, the highway_layout of the best
+            position so far.
+        init_nodes: (M, 2) highway nodes from an earlier run, e.g. from a HighwayStore.
+            The swarm starts around them (see warm_start_swarm, with `init_spread`)
+            instead of uniformly over the bounds.
+    """
+    dimensions = 2*M
+
+    # below is because each highway node has seperate bounds (although they are the same)
+    lower = np.tile(bbox_min, M)
+    upper = np.tile(bbox_max, M)
+    bounds = (lower, upper)
+
+    objective_args = dict(ports_xy=ports_xy, orders=orders, coastlines=coastlines, bbox_min=bbox_min,
+                          bbox_max=bbox_max, M=M, R=R, big_penalty=big_penalty, alpha_water=alpha_water,
+                          alpha_highway=alpha_highway, beta_switch=beta_switch,
+                          lambda_infrastructure=lambda_infrastructure)
+    layout_args = (ports_xy, orders, coastlines, M, R, alpha_water, alpha_highway, beta_switch)
+
+    init_pos = None
+    if init_nodes is not None and np.size(init_nodes) == dimensions:
+        init_pos = warm_start_swarm(init_nodes, particles, bounds, init_spread)
+
+    optimizer = GlobalBestPSO(
+        n_particles=particles,
+        dimensions=dimensions,
+        options={'c1': c1, 'c2': c2, 'w': w},
+        bounds=bounds,
+        init_pos=init_pos
+    )
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, mp_context=_pool_context(), initializer=_init_objective_worker,
+                                   initargs=(objective_args,))
+        objective = pool_objective(pool, workers)
+    else:
+        objective = objective_factory(**objective_args)
+
+    # The loop of GlobalBestPSO.optimize, with a progress report, cancellation and early stopping
+    swarm = optimizer.swarm
+    optimizer.bh.memory = swarm.position
+    optimizer.vh.memory = swarm.position
+    swarm.pbest_cost = np.full(particles, np.inf)
+    started = time.perf_counter()
+    best_cost, last_improvement, layout = inf, 0, None
+    try:
+        for i in range(iters):
+            swarm.current_cost = compute_objective_function(swarm, objective)
+            swarm.pbest_pos, swarm.pbest_cost = compute_pbest(swarm)
+            swarm.best_pos, swarm.best_cost = optimizer.top.compute_gbest(swarm)
+
+            if swarm.best_cost < best_cost:
+                best_cost, last_improvement, layout = float(swarm.best_cost), i, None
+            if progress is not None:
+                if layout is None:
+                    layout = highway_layout(swarm.best_pos, *layout_args)
+                progress(dict(iteration=i + 1, iters=iters, best_cost=best_cost, layout=layout,
+                              evals_per_sec=particles * (i + 1) / (time.perf_counter() - started)))
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if patience is not None and i - last_improvement >= patience:
+                break
+
+            swarm.options = optimizer.oh(optimizer.options, iternow=i, itermax=iters)
+            swarm.velocity = optimizer.top.compute_velocity(swarm, optimizer.velocity_clamp, optimizer.vh,
+                                                            optimizer.bounds)
+            swarm.position = optimizer.top.compute_position(swarm, optimizer.bounds, optimizer.bh)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    best_pos = swarm.pbest_pos[swarm.pbest_cost.argmin()]
+    highway_nodes, edges, all_nodes, order_paths_xy = highway_layout(best_pos, *layout_args)
     return highway_nodes, edges, best_cost, all_nodes, order_paths_xy
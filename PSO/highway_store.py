@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class HighwayStore:
+    """
+    Best highway nodes found so far per scenario, a scenario being a port layout
+    and an order matrix. optimize_highways can start from these: after a small
+    edit, like one more order or port, the closest stored scenario is usually a
+    good guess. Keeps the `capacity` most recently used scenarios.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # scenario key -> (highway_nodes, best_cost)
+
+    @staticmethod
+    def scenario_key(ports_xy, orders):
+        ports = tuple((round(float(x), 1), round(float(y), 1)) for x, y in ports_xy)
+        # Orders by port position rather than index, so they survive ports being added or removed
+        matrix = {}
+        for origin_index, destination_index, weight in orders:
+            pair = (ports[origin_index], ports[destination_index])
+            matrix[pair] = matrix.get(pair, 0) + weight
+        return ports, tuple(sorted(matrix.items()))
+
+    def add(self, ports_xy, orders, highway_nodes, best_cost):
+        """Remember `highway_nodes` for this scenario, unless a cheaper layout is already stored"""
+        key = self.scenario_key(ports_xy, orders)
+        stored = self.entries.get(key)
+        if stored is None or best_cost < stored[1] or np.shape(stored[0]) != np.shape(highway_nodes):
+            self.entries[key] = (np.array(highway_nodes, dtype=float), best_cost)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def lookup(self, ports_xy, orders, M):
+        """
+        Stored highway nodes (M, 2) for this scenario, or else for the stored one sharing
+        the most ports and orders with it (the most recent on ties). None if nothing
+        with M nodes has anything in common with it.
+        """
+        ports, matrix = self.scenario_key(ports_xy, orders)
+        best, best_score = None, 0
+        for (stored_ports, stored_matrix), (nodes, _) in reversed(self.entries.items()):
+            if nodes.shape != (M, 2):
+                continue
+            if stored_ports == ports and stored_matrix == matrix:
+                return nodes
+            score = len(set(ports) & set(stored_ports)) + len(set(matrix) & set(stored_matrix))
+            if score > best_score:
+                best, best_score = nodes, score
+        return best
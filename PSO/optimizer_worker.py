@@ -3,11 +3,18 @@ from queue import Queue
 
 
 def run_optimizer_task(optimize_fun, kwargs, result_queue, cancel_event: Event):
+    """
+    Run optimize_fun(**kwargs), reporting on `result_queue` as (kind, payload):
+    ("progress", info) after every iteration, then ("done", result), or
+    ("cancelled", result) with the best result found before `cancel_event` was
+    set, or ("failed", error).
+    """
     if cancel_event.is_set():
-        result_queue.put((False, "cancelled"))
+        result_queue.put(("cancelled", None))
         return
     try:
-        res = optimize_fun(**kwargs)
-        result_queue.put((True, res))
+        res = optimize_fun(**kwargs, cancel_event=cancel_event,
+                           progress=lambda info: result_queue.put(("progress", info)))
+        result_queue.put(("cancelled" if cancel_event.is_set() else "done", res))
     except Exception as e:
-        result_queue.put((False, e))
+        result_queue.put(("failed", e))
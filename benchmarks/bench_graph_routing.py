@@ -0,0 +1,90 @@
+"""
+Memory per node and Dijkstra latency of the CSR OceanGraph against the
+tuple-keyed dict graph it replaced, on the islands map for grid_gap 20, 10
+and 5. Also checks that both find routes of the same length.
+
+Run from the repository root:
+    python -m benchmarks.bench_graph_routing
+"""
+import heapq
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from math import inf
+
+from benchmarks.bench_ocean_graph import as_dicts
+from coastlines.svg_parser import svg_to_points
+from route_manager import RouteManager
+
+SCREEN_SIZE = (1280, 720)
+QUERIES = 20
+
+
+def dict_dijkstra(graph, weight, s, t):
+    """RouteManager.dijkstra as it was on the dict graph"""
+    pq = []
+    distances = defaultdict(lambda: inf)
+    distances[s] = 0
+    heapq.heappush(pq, (0, s))
+    edge_to = defaultdict(lambda: None)
+
+    while pq:
+        current_dist, node = heapq.heappop(pq)
+        if node == t:
+            path = []
+            while node:
+                path.append(node)
+                node = edge_to[node]
+            return current_dist, path[::-1]
+        if current_dist > distances[node]:
+            continue
+        for neighbor in graph[node]:
+            if (node, neighbor) not in weight:
+                print(f"Error: Missing weight for edge {node} -> {neighbor}")
+                continue
+            neighbor_dist = current_dist + weight[(node, neighbor)]
+            if neighbor_dist < distances[neighbor]:
+                distances[neighbor] = neighbor_dist
+                edge_to[neighbor] = node
+                heapq.heappush(pq, (neighbor_dist, neighbor))
+    return None, []
+
+
+def measured(f, *args):
+    """Result of f(*args) and the bytes it left allocated"""
+    tracemalloc.start()
+    result = f(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    route_manager = RouteManager(*SCREEN_SIZE, None)
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    for grid_gap in (20, 10, 5):
+        graph = route_manager.create_ocean_graph(coastlines, None, grid_gap, 20)
+        (adjacency, weight), dict_bytes = measured(as_dicts, graph)
+        n = len(graph)
+
+        rng = random.Random(grid_gap)
+        queries = [(rng.randrange(n), rng.randrange(n)) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        csr = [route_manager.dijkstra(graph, s, t) for s, t in queries]
+        csr_time = (time.perf_counter() - start) / QUERIES
+
+        start = time.perf_counter()
+        old = [dict_dijkstra(adjacency, weight, graph.coord(s), graph.coord(t)) for s, t in queries]
+        dict_time = (time.perf_counter() - start) / QUERIES
+
+        same = all((a is None and b is None) or abs(a - b) < 1e-9 for (a, _), (b, _) in zip(csr, old))
+        print(f"gap={grid_gap:<2} {n:6} nodes {graph.edge_count:7} edges | "
+              f"memory/node: dict {dict_bytes / n:6.0f} B, CSR {graph.nbytes / n:4.0f} B | "
+              f"dijkstra: dict {dict_time * 1e3:7.1f} ms, CSR {csr_time * 1e3:7.1f} ms "
+              f"({dict_time / csr_time:.1f}x) | same lengths: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Objective evaluations per second for the highway PSO, against the original
+objective that re-tests every node pair, port-to-port pairs included, one
+segment at a time for every particle, on the islands map with growing
+numbers of ports. Also checks that both give the same costs.
+
+Run from the repository root:
+    python -m benchmarks.bench_highway_objective
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from benchmarks.highway_settings import (HIGHWAY_NODES, OBJECTIVE_PARAMS, PARTICLES, SCREEN_SIZE,
+                                         evals_per_second)
+from coastlines.svg_parser import svg_to_points
+from PSO.highway_optimizer import dijkstra, objective_factory
+from utils.math_utils import point_on_land, segment_intersects_any_polygon
+
+def reference_adjacency_layered(nodes, polygons, R, ports, alpha_water, alpha_highway, beta_switch):
+    """The original build_adjacency_layered: every pair tested with segment_intersects_any_polygon"""
+    N = len(nodes)
+    adjacency_list = [[] for _ in range(2 * N)]
+    weights = {}
+
+    def add(u, v, cost):
+        adjacency_list[u].append(v)
+        weights[(u, v)] = cost
+        adjacency_list[v].append(u)
+        weights[(v, u)] = cost
+
+    for i in range(N):
+        for j in range(i + 1, N):
+            (x1, y1), (x2, y2) = nodes[i], nodes[j]
+            d = math.hypot(x1 - x2, y1 - y2)
+            if d <= R and not segment_intersects_any_polygon((x1, y1), (x2, y2), polygons):
+                add(i, j, alpha_water * d)
+                if i >= ports and j >= ports:
+                    add(N + i, N + j, alpha_highway * d)
+    for i in range(N):
+        add(i, N + i, beta_switch)
+    return adjacency_list, weights
+
+
+def reference_objective(ports_xy, orders, coastlines, M, R, big_penalty, alpha_water, alpha_highway, beta_switch,
+                        lambda_infrastructure):
+    ports_xy = np.array(ports_xy)
+    ports = ports_xy.shape[0]
+
+    def objective(X):
+        costs = np.zeros(X.shape[0], dtype=float)
+        for k in range(X.shape[0]):
+            highway_points = X[k].reshape(M, 2)
+            penalty = sum(point_on_land(tuple(point), coastlines) for point in highway_points) * big_penalty
+            nodes = np.vstack([ports_xy, highway_points])
+            N = len(nodes)
+            adj, weights = reference_adjacency_layered(nodes.tolist(), coastlines, R, ports, alpha_water,
+                                                       alpha_highway, beta_switch)
+            routing_cost = 0.0
+            for (origin_index, destination_index, weight) in orders:
+                shortest_path, _ = dijkstra(adj, weights, origin_index, destination_index)
+                routing_cost += big_penalty if shortest_path is None else weight * shortest_path
+            highway_length = sum(cost / alpha_highway for (u, v), cost in weights.items() if u >= N and v >= N and u < v)
+            costs[k] = routing_cost + penalty + lambda_infrastructure * highway_length
+        return costs
+    return objective
+
+
+def main():
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    rng = random.Random(0)
+    np_rng = np.random.default_rng(0)
+    X = np_rng.uniform([0, 0] * HIGHWAY_NODES, list(SCREEN_SIZE) * HIGHWAY_NODES, (PARTICLES, 2 * HIGHWAY_NODES))
+
+    for n_ports in (3, 8, 16):
+        ports_xy = rng.sample([p for coastline in coastlines for p in coastline], n_ports)
+        orders = [(i, rng.choice([j for j in range(n_ports) if j != i]), rng.randint(1, 4)) for i in range(n_ports)]
+
+        start = time.perf_counter()
+        objective = objective_factory(ports_xy, orders, coastlines, None, None, HIGHWAY_NODES, **OBJECTIVE_PARAMS)
+        setup = time.perf_counter() - start
+        reference, expected = evals_per_second(
+            reference_objective(ports_xy, orders, coastlines, HIGHWAY_NODES, **OBJECTIVE_PARAMS), X)
+        precomputed, costs = evals_per_second(objective, X)
+        print(f"{n_ports:2} ports + {HIGHWAY_NODES} highway nodes: original {reference:7.1f} evals/s, "
+              f"current {precomputed:7.1f} evals/s ({precomputed / reference:4.1f}x, "
+              f"setup {setup * 1e3:4.0f} ms), same costs: {np.allclose(costs, expected)}")
+
+
+if __name__ == "__main__":
+    main()
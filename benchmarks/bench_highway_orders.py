@@ -0,0 +1,109 @@
+"""
+Routing the orders of the highway PSO objective with one csgraph search per
+origin port against one dict Dijkstra per order, on the islands map with 8
+ports and a growing number of orders: routing time per evaluation (layered
+graph plus searches, best of 5). Also whole-objective evaluations per second
+against the per-order objective; objective_factory switches to csgraph from
+CSGRAPH_MIN_ORDERS orders on. Checks that both give identical costs.
+
+Run from the repository root:
+    python -m benchmarks.bench_highway_orders
+"""
+import random
+import timeit
+
+import numpy as np
+
+from benchmarks.highway_settings import (HIGHWAY_NODES, OBJECTIVE_PARAMS, PARTICLES, SCREEN_SIZE,
+                                         evals_per_second)
+from coastlines.svg_parser import svg_to_points
+from PSO.highway_optimizer import (CSGRAPH_MIN_ORDERS, build_adjacency_layered, csgraph_dijkstra, dijkstra,
+                                   layered_adjacency, layered_csgraph, objective_factory, visible_pairs)
+from utils.math_utils import point_on_land, polygon_edges
+
+PORTS = 8
+
+
+def per_order_objective(ports_xy, orders, coastlines, M, R, big_penalty, alpha_water, alpha_highway, beta_switch,
+                        lambda_infrastructure):
+    """The objective before csgraph: one dict-based dijkstra per order"""
+    ports_xy = np.array(ports_xy)
+    ports = ports_xy.shape[0]
+    edges = polygon_edges(coastlines)
+    port_edges = visible_pairs(ports_xy.tolist(), edges, R)
+
+    def objective(X):
+        costs = np.zeros(X.shape[0], dtype=float)
+        for k in range(X.shape[0]):
+            highway_points = X[k].reshape(M, 2)
+            penalty = np.array([point_on_land(tuple(point), coastlines) for point in highway_points]).sum() * big_penalty
+            nodes = np.vstack([ports_xy, highway_points])
+            N = len(nodes)
+            adj, weights = build_adjacency_layered(nodes.tolist(), coastlines, R, ports, alpha_water, alpha_highway,
+                                                   beta_switch, port_edges, edges)
+            routing_cost = 0.0
+            for (origin_index, destination_index, weight) in orders:
+                shortest_path, _ = dijkstra(adj, weights, origin_index, destination_index)
+                routing_cost += big_penalty if shortest_path is None else weight * shortest_path
+            highway_length = 0.0
+            for (u, v), cost_uv in weights.items():
+                if u >= N and v >= N and u < v:
+                    highway_length += cost_uv / alpha_highway
+            costs[k] = routing_cost + penalty + lambda_infrastructure * highway_length
+        return costs
+    return objective
+
+
+def routing_time(route, graphs, repeat=5):
+    """Best time per particle graph of route(visible, N)"""
+    return min(timeit.repeat(lambda: [route(*graph) for graph in graphs], number=1, repeat=repeat)) / len(graphs)
+
+
+
+def main():
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    rng = random.Random(0)
+    ports_xy = rng.sample([p for coastline in coastlines for p in coastline], PORTS)
+    X = np.random.default_rng(0).uniform([0, 0] * HIGHWAY_NODES, list(SCREEN_SIZE) * HIGHWAY_NODES,
+                                         (PARTICLES, 2 * HIGHWAY_NODES))
+
+    for n_orders in (3, 6, 10, 15, 30, 100):
+        orders = []
+        while len(orders) < n_orders:
+            origin, destination = rng.randrange(PORTS), rng.randrange(PORTS)
+            if origin != destination:
+                orders.append((origin, destination, rng.randint(1, 4)))
+
+        N = PORTS + HIGHWAY_NODES
+        port_edges = visible_pairs(ports_xy, polygon_edges(coastlines), OBJECTIVE_PARAMS["R"])
+        graphs = []
+        for x in X:
+            nodes = ports_xy + [tuple(p) for p in x.reshape(HIGHWAY_NODES, 2).tolist()]
+            visible = dict(port_edges)
+            visible.update(visible_pairs(nodes, polygon_edges(coastlines), OBJECTIVE_PARAMS["R"], skip=PORTS))
+            graphs.append((nodes, visible))
+        weights = tuple(OBJECTIVE_PARAMS[key] for key in ("alpha_water", "alpha_highway", "beta_switch"))
+        origins = sorted({o for o, _, _ in orders})
+
+        def per_order(nodes, visible):
+            adj, w = layered_adjacency(visible, N, PORTS, *weights)
+            return [dijkstra(adj, w, o, d)[0] for o, d, _ in orders]
+
+        def per_origin(nodes, visible):
+            graph, _ = layered_csgraph(visible, N, PORTS, *weights)
+            distances = csgraph_dijkstra(graph, indices=origins).tolist()
+            return [distances[origins.index(o)][d] for o, d, _ in orders]
+
+        before, after = routing_time(per_order, graphs), routing_time(per_origin, graphs)
+        reference, expected = evals_per_second(per_order_objective(ports_xy, orders, coastlines, HIGHWAY_NODES,
+                                                                   **OBJECTIVE_PARAMS), X)
+        csgraph, costs = evals_per_second(objective_factory(ports_xy, orders, coastlines, None, None,
+                                                            HIGHWAY_NODES, **OBJECTIVE_PARAMS), X)
+        method = "csgraph" if n_orders >= CSGRAPH_MIN_ORDERS else "dict"
+        print(f"{n_orders:3} orders ({len(origins)} origins): routing {before * 1e6:5.0f} -> {after * 1e6:4.0f} us "
+              f"({before / after:4.1f}x) | objective ({method:7}) {reference:4.0f} -> {csgraph:4.0f} evals/s, "
+              f"identical costs: {np.array_equal(costs, expected)}")
+
+
+if __name__ == "__main__":
+    main()
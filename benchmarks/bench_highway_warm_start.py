@@ -0,0 +1,75 @@
+"""
+Iterations for optimize_highways to reach a target cost from a random swarm
+and when warm-started from the best layout of the scenario before a small
+edit (one more order, one more port), on the islands map. The target is
+what a full run from a random swarm typically delivers: the median final
+cost of the random-swarm runs. Also shows the spread of final costs.
+
+Run from the repository root:
+    python -m benchmarks.bench_highway_warm_start
+"""
+import logging
+import random
+
+import numpy as np
+
+from benchmarks.highway_settings import HIGHWAY_NODES, OPTIMIZER_PARAMS, SCREEN_SIZE
+from coastlines.svg_parser import svg_to_points
+from PSO.highway_optimizer import optimize_highways
+from PSO.highway_store import HighwayStore
+
+PORTS = 8
+SEEDS = range(5)
+BUDGET = 60  # iterations per timed run
+
+
+def run(ports_xy, orders, coastlines, iters, seed, init_nodes=None):
+    """Best cost after each iteration, and the final best nodes"""
+    np.random.seed(seed)
+    history = []
+    highway_nodes, _, _, _, _ = optimize_highways(ports_xy, orders, coastlines, np.array([0.0, 0.0]),
+                                                  np.array(SCREEN_SIZE, dtype=float), iters=iters,
+                                                  init_nodes=init_nodes,
+                                                  progress=lambda info: history.append(info["best_cost"]),
+                                                  **OPTIMIZER_PARAMS)
+    return history, highway_nodes
+
+
+def iterations_to(target, history):
+    return next((i + 1 for i, cost in enumerate(history) if cost <= target), None)
+
+
+def main():
+    logging.getLogger("pyswarms").setLevel(logging.WARNING)
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    rng = random.Random(0)
+    points = rng.sample([p for coastline in coastlines for p in coastline], PORTS + 1)
+    ports_xy = points[:PORTS]
+    orders = [(i, (i + 3) % PORTS, rng.randint(1, 4)) for i in range(PORTS)]
+
+    store = HighwayStore()
+    history, highway_nodes = run(ports_xy, orders, coastlines, BUDGET, seed=100)
+    store.add(ports_xy, orders, highway_nodes, history[-1])
+    print(f"before the edit: cost {history[-1]:.0f} after {BUDGET} iterations")
+
+    edits = {
+        "one more order": (ports_xy, orders + [(1, 6, 3)]),
+        "one more port": (points, orders + [(PORTS, 2, 2)]),
+    }
+    for name, (edited_ports, edited_orders) in edits.items():
+        init_nodes = store.lookup(edited_ports, edited_orders, HIGHWAY_NODES)
+        histories = {label: [run(edited_ports, edited_orders, coastlines, BUDGET, seed, start)[0] for seed in SEEDS]
+                     for label, start in (("random swarm", None), ("warm start", init_nodes))}
+        target = np.median([history[-1] for history in histories["random swarm"]])
+        print(f"{name}: target cost {target:.0f}")
+        for label, runs in histories.items():
+            iterations = [iterations_to(target, history) for history in runs]
+            reached = [i for i in iterations if i is not None]
+            mean = f"{np.mean(reached):5.1f}" if reached else "    -"
+            finals = [history[-1] for history in runs]
+            print(f"  {label:12} {mean} iterations on average, reached in {len(reached)}/{len(runs)} runs "
+                  f"{iterations} | final cost {min(finals):.0f}-{max(finals):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Scaling of optimize_highways over evaluation worker processes (1, 2, 4 and
+8) on the islands map with 16 ports: wall time per run and objective
+evaluations per second. Also checks that every worker count finds the same
+best cost from the same seed.
+
+A speedup needs that many free cores; on fewer cores the extra workers only
+add process start and transfer overhead.
+
+Run from the repository root:
+    python -m benchmarks.bench_highway_workers
+"""
+import logging
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmarks.highway_settings import OPTIMIZER_PARAMS, PARTICLES, SCREEN_SIZE
+from coastlines.svg_parser import svg_to_points
+from PSO.highway_optimizer import optimize_highways
+
+PORTS = 16
+WORKERS = (1, 2, 4, 8)
+ITERS = 10
+
+
+def main():
+    logging.getLogger("pyswarms").setLevel(logging.WARNING)
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    rng = random.Random(0)
+    ports_xy = rng.sample([p for coastline in coastlines for p in coastline], PORTS)
+    orders = [(i, rng.choice([j for j in range(PORTS) if j != i]), rng.randint(1, 4)) for i in range(PORTS)]
+    print(f"{PORTS} ports, {PARTICLES} particles x {ITERS} iterations, {os.cpu_count()} CPUs")
+
+    costs = {}
+    for workers in WORKERS:
+        np.random.seed(0)
+        start = time.perf_counter()
+        _, _, costs[workers], _, _ = optimize_highways(ports_xy, orders, coastlines, np.array([0.0, 0.0]),
+                                                       np.array(SCREEN_SIZE, dtype=float), iters=ITERS,
+                                                       workers=workers, **OPTIMIZER_PARAMS)
+        elapsed = time.perf_counter() - start
+        print(f"  {workers} worker{'s' if workers > 1 else ' '} {elapsed:6.2f} s, "
+              f"{ITERS * PARTICLES / elapsed:6.0f} evals/s, best cost {costs[workers]:.2f}")
+    print(f"same best cost: {len(set(costs.values())) == 1}")
+
+
+if __name__ == "__main__":
+    main()
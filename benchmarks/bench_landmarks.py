@@ -0,0 +1,57 @@
+"""
+ALT landmark index against plain A* and Dijkstra for port-to-port queries
+on the bundled maps at fine grid spacing: preprocessing time, nodes
+expanded and latency per pair. Also checks that route costs agree.
+
+Run from the repository root:
+    python -m benchmarks.bench_landmarks
+"""
+import glob
+import os
+import random
+import time
+
+from coastlines.svg_parser import svg_to_points
+from landmarks import LandmarkIndex
+from route_manager import RouteManager
+
+SCREEN_SIZE = (1280, 720)
+PORTS = 10
+LANDMARKS = 8
+METHODS = ("dijkstra", "astar", "alt")
+
+
+def main():
+    for svg in sorted(glob.glob('coastlines/svg/*.svg')):
+        coastlines = svg_to_points(svg, step=10, scale=1.2)
+        rng = random.Random(0)
+        port_points = rng.sample([p for coastline in coastlines for p in coastline], PORTS)
+        for grid_gap in (10, 5):
+            route_manager = RouteManager(*SCREEN_SIZE, None)
+            graph = route_manager.create_ocean_graph(coastlines, None, grid_gap, 20)
+            start = time.perf_counter()
+            route_manager.landmarks = LandmarkIndex.build(graph, LANDMARKS)
+            build = time.perf_counter() - start
+
+            nodes = [graph.closest_node(p) for p in port_points]
+            pairs = [(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:]]
+            line = f"{os.path.basename(svg):12} gap={grid_gap} {len(graph):6} nodes, build {build * 1e3:5.0f} ms |"
+            costs = {}
+            for method in METHODS:
+                expanded = 0
+                costs[method] = []
+                start = time.perf_counter()
+                for a, b in pairs:
+                    stats = {}
+                    cost, _ = route_manager.shortest_path(graph, a, b, method, stats)
+                    expanded += stats["expanded"]
+                    costs[method].append(cost)
+                elapsed = time.perf_counter() - start
+                line += f" {method} {expanded / len(pairs):6.0f} nodes {elapsed / len(pairs) * 1e3:6.2f} ms |"
+            same = all((c is None and d is None) or abs(c - d) < 1e-6
+                       for method in METHODS for c, d in zip(costs[method], costs["dijkstra"]))
+            print(line + f" same costs: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup time of RouteManager.create_ocean_graph against the original
+per-point implementation, on the bundled maps and several grid gaps.
+Also checks that both build the same graph.
+
+Run from the repository root:
+    python -m benchmarks.bench_ocean_graph
+"""
+import glob
+import os
+import time
+from collections import defaultdict
+from math import dist
+
+import numpy as np
+
+from coastlines.svg_parser import svg_to_points
+from route_manager import RouteManager
+from utils.math_utils import point_in_polygon
+
+SCREEN_SIZE = (1280, 720)
+# The original implementation is only timed where it finishes in reasonable time
+REFERENCE_GAPS = (20, 10)
+
+
+def close_to_coastline(point, coastlines, min_dist):
+    for poly in coastlines:
+        for p in poly:
+            if dist(point, p) < min_dist:
+                return True
+    return False
+
+
+def reference_ocean_graph(coastlines, width, height, grid_gap, min_dist):
+    """create_ocean_graph as it was before vectorization"""
+    graph = defaultdict(list)
+    weight = {}
+    for x in range(0 + grid_gap, width, grid_gap):
+        for y in range(0 + grid_gap, height, grid_gap):
+            if not any([point_in_polygon((x, y), poly) or close_to_coastline((x, y), coastlines, min_dist) for poly in coastlines]):
+                graph[(x, y)] = []
+
+    for x, y in graph.keys():
+        for x2, y2 in [(x - grid_gap, y), (x + grid_gap, y), (x, y - grid_gap), (x, y + grid_gap),
+                       (x - grid_gap, y - grid_gap), (x - grid_gap, y + grid_gap),
+                       (x + grid_gap, y + grid_gap), (x + grid_gap, y - grid_gap)]:
+            if (x2, y2) in graph.keys():
+                graph[(x, y)].append((x2, y2))
+                if x == x2 or y == y2:
+                    weight[(x, y), (x2, y2)] = grid_gap
+                else:
+                    weight[(x, y), (x2, y2)] = np.sqrt(grid_gap ** 2 + grid_gap ** 2)
+        for x2, y2 in [(x - 2*grid_gap, y - grid_gap), (x - 2*grid_gap, y + grid_gap),
+                       (x + 2*grid_gap, y - grid_gap), (x + 2*grid_gap, y + grid_gap),
+                       (x - grid_gap, y - 2*grid_gap), (x + grid_gap, y - 2*grid_gap),
+                       (x - grid_gap, y + 2*grid_gap), (x + grid_gap, y + 2*grid_gap)]:
+            if (x2, y2) in graph.keys():
+                graph[(x, y)].append((x2, y2))
+                weight[(x, y), (x2, y2)] = np.sqrt((grid_gap*2) ** 2 + grid_gap ** 2)
+
+    return graph, weight
+
+
+def as_dicts(graph):
+    """An OceanGraph as the adjacency/weight dicts create_ocean_graph used to return"""
+    adjacency = defaultdict(list)
+    weight = {}
+    for i in range(len(graph)):
+        node = graph.coord(i)
+        adjacency[node] = []
+        for k in range(graph.indptr[i], graph.indptr[i + 1]):
+            neighbor = graph.coord(graph.indices[k])
+            adjacency[node].append(neighbor)
+            weight[node, neighbor] = float(graph.weights[k])
+    return adjacency, weight
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    route_manager = RouteManager(*SCREEN_SIZE, None)
+    for svg in sorted(glob.glob('coastlines/svg/*.svg')):
+        coastlines = svg_to_points(svg, step=10, scale=1.2)
+        for grid_gap in (20, 10, 5):
+            graph, batched = timed(route_manager.create_ocean_graph, coastlines, None, grid_gap, grid_gap)
+            line = f"{os.path.basename(svg):12} gap={grid_gap:<2} {len(graph):6} nodes: batched {batched * 1e3:8.1f} ms"
+            if grid_gap in REFERENCE_GAPS:
+                (ref_graph, ref_weights), reference = timed(reference_ocean_graph, coastlines, *SCREEN_SIZE,
+                                                            grid_gap, grid_gap)
+                adjacency, weights = as_dicts(graph)
+                same = dict(ref_graph) == dict(adjacency) and ref_weights == weights
+                line += f", original {reference * 1e3:8.1f} ms ({reference / batched:5.1f}x), same graph: {same}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Quadtree ocean graph against the uniform grid at the same finest spacing
+(grid_gap 5 vs 5 px quadtree cells along the coast and near the ports, as
+Simulation builds it): node count, A* time per port pair, and route length
+relative to the grid, raw and smoothed. Ports are coastline vertices.
+Asserts that both graphs have the same connected components and connect
+the same port pairs.
+
+Run from the repository root:
+    python -m benchmarks.bench_quadtree_graph
+"""
+import glob
+import os
+import random
+import time
+from math import dist
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from coastlines.svg_parser import svg_to_points
+from quadtree_graph import build_quadtree_graph
+from route_manager import RouteManager
+from utils.nearest_index import NearestIndex
+
+SCREEN_SIZE = (1280, 720)
+PORTS = 10
+FINEST = 5
+COARSEST = 160
+REFINE_RADIUS = 40
+CLEARANCE = 10
+
+
+def route_lengths(route_manager, graph, a, b, path):
+    """(raw, smoothed) lengths of the port-to-port route along `path`, or None if there is none"""
+    if not path:
+        return None
+    points = graph.path_coords(path)
+    lengths = []
+    for route in ([a] + points + [b], [a] + route_manager.smooth_path(points) + [b]):
+        lengths.append(sum(dist(p, q) for p, q in zip(route, route[1:])))
+    return lengths
+
+
+def components(graph):
+    """Connected component label of every node"""
+    matrix = csr_matrix((graph.weights, graph.indices, graph.indptr), shape=(len(graph), len(graph)))
+    return connected_components(matrix, directed=False)[1]
+
+
+def same_components(grid, quadtree):
+    """Whether every component of each graph meets exactly one component of the other, nodes matched by proximity"""
+    grid_labels, quadtree_labels = components(grid), components(quadtree)
+    quadtree_index, grid_index = NearestIndex(quadtree.coords), NearestIndex(grid.coords)
+    matched = set(zip(grid_labels, quadtree_labels[quadtree_index.nearest_many(grid.coords)]))
+    matched |= set(zip(grid_labels[grid_index.nearest_many(quadtree.coords)], quadtree_labels))
+    return len(matched) == len(set(grid_labels)) == len(set(quadtree_labels))
+
+
+def main():
+    for svg in sorted(glob.glob('coastlines/svg/*.svg')):
+        coastlines = svg_to_points(svg, step=10, scale=1.2)
+        rng = random.Random(0)
+        port_points = rng.sample([p for coastline in coastlines for p in coastline], PORTS)
+        pairs = [(a, b) for i, a in enumerate(port_points) for b in port_points[i + 1:]]
+
+        route_manager = RouteManager(*SCREEN_SIZE, None)
+        route_manager.enable_smoothing(coastlines, CLEARANCE)
+        grid = route_manager.create_ocean_graph(coastlines, None, FINEST, 20)
+        start = time.perf_counter()
+        quadtree = build_quadtree_graph(coastlines, *SCREEN_SIZE, FINEST, COARSEST, 20, port_points, REFINE_RADIUS)
+        build = time.perf_counter() - start
+        assert same_components(grid, quadtree), f"{svg}: grid and quadtree graphs have different components"
+
+        results, times = [], []
+        for graph in (grid, quadtree):
+            ends = [(graph.closest_node(a), graph.closest_node(b)) for a, b in pairs]
+            start = time.perf_counter()
+            paths = [route_manager.shortest_path(graph, s, t, "astar")[1] for s, t in ends]
+            times.append((time.perf_counter() - start) / len(pairs))
+            results.append([route_lengths(route_manager, graph, a, b, path) for (a, b), path in zip(pairs, paths)])
+
+        both = [(g, q) for g, q in zip(*results) if g is not None and q is not None]
+        one_only = sum((g is None) != (q is None) for g, q in zip(*results))
+        assert one_only == 0, f"{svg}: {one_only} port pairs are connected in only one graph"
+        raw = np.mean([q[0] / g[0] for g, q in both])
+        smoothed = np.mean([q[1] / g[1] for g, q in both])
+        print(f"{os.path.basename(svg):12} nodes {len(grid):6} -> {len(quadtree):5} ({len(grid) / len(quadtree):4.1f}x), "
+              f"build {build * 1e3:4.0f} ms | A* {times[0] * 1e3:6.2f} -> {times[1] * 1e3:5.2f} ms/pair "
+              f"({times[0] / times[1]:4.1f}x) | length vs grid: raw {raw:.3f}, smoothed {smoothed:.3f} "
+              f"| {len(pairs) - len(both)} pairs unconnected in both")
+
+
+if __name__ == "__main__":
+    main()
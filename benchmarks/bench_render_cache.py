@@ -0,0 +1,68 @@
+"""
+Frame time of drawing ships, ports and overlay text with and without a
+RenderCache.
+
+Run from the repository root:
+    python -m benchmarks.bench_render_cache
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from port import Port
+from render_cache import RenderCache
+from ship import Ship
+from ship_manager import ShipManager
+
+SCREEN_SIZE = (1280, 720)
+FRAMES = 60
+
+
+def make_scene(n_ships, n_ports=10, seed=0):
+    rng = random.Random(seed)
+    manager = ShipManager(SCREEN_SIZE, None, {})
+    for _ in range(n_ships):
+        ship = Ship(rng.uniform(0, SCREEN_SIZE[0]), rng.uniform(0, SCREEN_SIZE[1]))
+        ship.vx, ship.vy = rng.uniform(-1, 1), rng.uniform(-1, 1)
+        manager.add_ship(ship)
+    ports = [Port(rng.uniform(0, SCREEN_SIZE[0]), rng.uniform(0, SCREEN_SIZE[1]), capacity=20) for _ in range(n_ports)]
+    return manager, ports
+
+
+def frame_time(manager, ports, screen, render_cache):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        screen.fill((0, 105, 148))
+        manager.draw_ships(screen, render_cache)
+        manager.draw_ports(ports, screen, render_cache)
+        if render_cache is not None:
+            text = render_cache.text("Optimizing highways…", 24, (255, 255, 255))
+        else:
+            text = pygame.font.SysFont(None, 24).render("Optimizing highways…", True, (255, 255, 255))
+        screen.blit(text, (10, 10))
+        # Ships turn a little every frame, like they do while sailing
+        for ship in manager.ships:
+            ship.vx, ship.vy = ship.vx * 0.999 - ship.vy * 0.04, ship.vy * 0.999 + ship.vx * 0.04
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    for n_ships in (500, 1000, 2000):
+        manager, ports = make_scene(n_ships)
+        uncached = frame_time(manager, ports, screen, None)
+        render_cache = RenderCache()
+        frame_time(manager, ports, screen, render_cache)  # warm the sprite cache
+        cached = frame_time(manager, ports, screen, render_cache)
+        print(f"{n_ships:>5} ships: uncached {uncached * 1e3:6.2f} ms/frame, cached {cached * 1e3:6.2f} ms/frame "
+              f"({uncached / cached:4.1f}x)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
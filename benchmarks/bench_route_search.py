@@ -0,0 +1,51 @@
+"""
+Nodes expanded and latency per port pair for the route searches in
+RouteManager (dijkstra, astar, bidirectional) on the islands map, with
+ports placed on coastline vertices. Also checks that all searches agree
+on the route cost.
+
+Run from the repository root:
+    python -m benchmarks.bench_route_search
+"""
+import random
+import time
+
+from coastlines.svg_parser import svg_to_points
+from route_manager import RouteManager
+
+SCREEN_SIZE = (1280, 720)
+PORTS = 8
+METHODS = ("dijkstra", "astar", "bidirectional")
+
+
+def main():
+    route_manager = RouteManager(*SCREEN_SIZE, None)
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    rng = random.Random(0)
+    port_points = rng.sample([p for coastline in coastlines for p in coastline], PORTS)
+
+    for grid_gap in (20, 10, 5):
+        graph = route_manager.create_ocean_graph(coastlines, None, grid_gap, 20)
+        nodes = [graph.closest_node(p) for p in port_points]
+        pairs = [(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:]]
+
+        costs = {}
+        print(f"gap={grid_gap} ({len(graph)} nodes), {len(pairs)} port pairs:")
+        for method in METHODS:
+            expanded = 0
+            costs[method] = []
+            start = time.perf_counter()
+            for a, b in pairs:
+                stats = {}
+                cost, _ = route_manager.shortest_path(graph, a, b, method, stats)
+                expanded += stats["expanded"]
+                costs[method].append(cost)
+            elapsed = time.perf_counter() - start
+            print(f"  {method:13} {expanded / len(pairs):8.0f} nodes expanded, {elapsed / len(pairs) * 1e3:7.2f} ms per pair")
+
+        same = all(abs(c - d) < 1e-9 for method in METHODS for c, d in zip(costs[method], costs["dijkstra"]))
+        print(f"  same costs: {same}")
+
+
+if __name__ == "__main__":
+    main()
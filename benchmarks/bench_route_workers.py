@@ -0,0 +1,65 @@
+"""
+All-pairs port routes computed in the frame against a process pool, on the
+islands map at fine grid spacing with smoothing on: wall time until every
+route is in, and the longest the calling (render) thread is blocked while
+the pool works. Also checks that both give the same routes.
+
+Speedup over in-frame routing needs as many free cores as workers; the main
+thread stays free either way.
+
+Run from the repository root:
+    python -m benchmarks.bench_route_workers
+"""
+import random
+import time
+
+from coastlines.svg_parser import svg_to_points
+from port import Port
+from route_manager import RouteManager
+
+SCREEN_SIZE = (1280, 720)
+PORTS = 12
+GRID_GAP = 5
+CLEARANCE = 10
+WORKERS = (1, 2, 4)
+
+
+def main():
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    rng = random.Random(0)
+    ports = [Port(x, y, capacity=20) for x, y in rng.sample([p for c in coastlines for p in c], PORTS)]
+
+    route_manager = RouteManager(*SCREEN_SIZE, None)
+    graph = route_manager.create_ocean_graph(coastlines, None, GRID_GAP, 20)
+    route_manager.enable_smoothing(coastlines, CLEARANCE)
+    print(f"gap={GRID_GAP} ({len(graph)} nodes), {PORTS} ports, {PORTS * (PORTS - 1) // 2} port pairs")
+
+    start = time.perf_counter()
+    route_manager.generate_routes(ports, graph)
+    elapsed = time.perf_counter() - start
+    expected = {key: list(route) for key, route in route_manager.routes.items()}
+    print(f"  in frame   {elapsed * 1e3:7.0f} ms total, main thread blocked {elapsed * 1e3:7.0f} ms")
+
+    for workers in WORKERS:
+        start = time.perf_counter()
+        route_manager.start_route_workers(graph, workers)
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        route_manager.generate_routes_async(ports, graph)
+        blocked = time.perf_counter() - start
+        while route_manager.routes_pending:
+            poll = time.perf_counter()
+            route_manager.poll_routes()
+            blocked = max(blocked, time.perf_counter() - poll)
+            time.sleep(1 / 60)  # one frame
+        elapsed = time.perf_counter() - start
+        same = route_manager.routes == expected
+        route_manager.stop_route_workers()
+        print(f"  {workers} worker{'s' if workers > 1 else ' '} {elapsed * 1e3:7.0f} ms total, "
+              f"main thread blocked {blocked * 1e3:7.1f} ms at most (pool start {startup * 1e3:4.0f} ms), "
+              f"same routes: {same}")
+
+
+if __name__ == "__main__":
+    main()
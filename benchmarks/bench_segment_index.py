@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of Ship.move and Ship.line_follow_check scanning every
+coastline segment ("scan") versus querying a SegmentIndex ("index"),
+on the bundled maps.
+
+Run from the repository root:
+    python -m benchmarks.bench_segment_index
+"""
+import glob
+import os
+import random
+import time
+
+from coastlines.segment_index import SegmentIndex
+from coastlines.svg_parser import svg_to_points
+from ship import Ship
+from utils.math_utils import point_on_land
+
+SHIPS = 200
+
+
+def place_ships(coastlines, n, seed=0):
+    rng = random.Random(seed)
+    xs = [p[0] for c in coastlines for p in c]
+    ys = [p[1] for c in coastlines for p in c]
+    ships = []
+    while len(ships) < n:
+        x, y = rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys))
+        if not point_on_land((x, y), coastlines):
+            ship = Ship(x, y)
+            ship.vx, ship.vy = rng.uniform(-1, 1), rng.uniform(-1, 1)
+            ships.append(ship)
+    return ships
+
+
+def time_pass(ships, coastlines, segment_index):
+    """Seconds per ship for one line_follow_check + move, without integrating the motion"""
+    start = time.perf_counter()
+    for ship in ships:
+        x, y, vx, vy = ship.x, ship.y, ship.vx, ship.vy
+        ship.line_follow = False
+        ship.line_follow_check(coastlines, segment_index=segment_index)
+        ship.move([], coastlines, segment_index=segment_index)
+        ship.x, ship.y, ship.vx, ship.vy = x, y, vx, vy
+    return (time.perf_counter() - start) / len(ships)
+
+
+def main():
+    for svg, step in [(svg, step) for step in (10, 1) for svg in sorted(glob.glob('coastlines/svg/*.svg'))]:
+        coastlines = svg_to_points(svg, step=step, scale=1.2)
+        start = time.perf_counter()
+        segment_index = SegmentIndex(coastlines)
+        build = time.perf_counter() - start
+        ships = place_ships(coastlines, SHIPS)
+        scan = time_pass(ships, coastlines, None)
+        indexed = time_pass(ships, coastlines, segment_index)
+        print(f"{os.path.basename(svg):12} step={step:<2} {len(segment_index):5} segments, build {build * 1e3:6.1f} ms: "
+              f"scan {scan * 1e6:8.1f} us/ship, index {indexed * 1e6:6.1f} us/ship ({scan / indexed:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Batch segment-versus-coastline test (segments_intersect_edges) against the
+per-segment segment_intersects_any_polygon, on the bundled maps: segments
+per second, and the highway optimizer's build_adjacency_layered with the
+original per-pair loop. Also checks that both agree on every segment.
+
+Segments join random points and coastline vertices, so touching and
+collinear cases are covered as well as clean crossings.
+
+Run from the repository root:
+    python -m benchmarks.bench_segment_kernel
+"""
+import glob
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from coastlines.svg_parser import svg_to_points
+from PSO.highway_optimizer import build_adjacency_layered
+from utils.math_utils import polygon_edges, segment_intersects_any_polygon, segments_intersect_edges
+
+SCREEN_SIZE = (1280, 720)
+SEGMENTS = 2000
+NODES = 12  # ports + highway nodes in one optimizer graph
+R = 800
+
+
+def reference_adjacency(nodes, polygons, R):
+    """The original pair loop of build_adjacency_layered, W layer only"""
+    edges = {}
+    for i in range(len(nodes)):
+        for j in range(i + 1, len(nodes)):
+            (x1, y1), (x2, y2) = nodes[i], nodes[j]
+            d = math.hypot(x1 - x2, y1 - y2)
+            if d <= R and not segment_intersects_any_polygon((x1, y1), (x2, y2), polygons):
+                edges[(i, j)] = d
+    return edges
+
+
+def main():
+    for svg in sorted(glob.glob('coastlines/svg/*.svg')):
+        coastlines = svg_to_points(svg, step=10, scale=1.2)
+        edges = polygon_edges(coastlines)
+        rng = random.Random(0)
+        vertices = [p for coastline in coastlines for p in coastline]
+
+        def point():
+            return rng.choice(vertices) if rng.random() < 0.3 else (rng.uniform(0, SCREEN_SIZE[0]), rng.uniform(0, SCREEN_SIZE[1]))
+
+        segments = [(point(), point()) for _ in range(SEGMENTS)]
+        start = time.perf_counter()
+        expected = [segment_intersects_any_polygon(p, q, coastlines) for p, q in segments]
+        scalar = time.perf_counter() - start
+        start = time.perf_counter()
+        mask = segments_intersect_edges([p for p, _ in segments], [q for _, q in segments], *edges)
+        batch = time.perf_counter() - start
+
+        nodes = [point() for _ in range(NODES)]
+        start = time.perf_counter()
+        reference = reference_adjacency(nodes, coastlines, R)
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        _, weights = build_adjacency_layered(nodes, coastlines, R, NODES, edges=edges)
+        layered = time.perf_counter() - start
+        same_graph = {(u, v): d for (u, v), d in weights.items() if u < v < NODES} == reference
+
+        print(f"{os.path.basename(svg):12} {len(edges[0]):5} edges | {SEGMENTS} segments: per segment "
+              f"{SEGMENTS / scalar:8.0f}/s, batch {SEGMENTS / batch:8.0f}/s ({scalar / batch:5.1f}x), "
+              f"same: {np.array_equal(mask, expected)} ({sum(expected)} cross) | "
+              f"{NODES}-node adjacency {loop * 1e3:6.1f} -> {layered * 1e3:5.1f} ms, same: {same_graph}")
+
+
+if __name__ == "__main__":
+    main()
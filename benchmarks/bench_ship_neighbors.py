@@ -0,0 +1,48 @@
+"""
+Ticks/sec of ShipManager.update_ships with brute-force neighbor scans
+("before") versus the spatial grid ("after").
+
+Run from the repository root:
+    python -m benchmarks.bench_ship_neighbors
+"""
+import random
+import time
+
+import pygame
+
+from ship import Ship
+from ship_manager import ShipManager
+
+SCREEN_SIZE = (1280, 720)
+
+
+def make_manager(n_ships, seed=0):
+    rng = random.Random(seed)
+    screen = pygame.Surface(SCREEN_SIZE)
+    manager = ShipManager(SCREEN_SIZE, screen, {})
+    manager.show_ship_sensors = False
+    for _ in range(n_ships):
+        x, y = rng.uniform(0, SCREEN_SIZE[0]), rng.uniform(0, SCREEN_SIZE[1])
+        manager.add_ship(Ship(x, y, route=[(rng.uniform(0, SCREEN_SIZE[0]), rng.uniform(0, SCREEN_SIZE[1]))]))
+    return manager
+
+
+def ticks_per_second(manager, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        manager.update_ships([])
+    return ticks / (time.perf_counter() - start)
+
+
+def main():
+    for n_ships, ticks in [(100, 50), (1_000, 5), (10_000, 1)]:
+        brute = make_manager(n_ships)
+        # Every ship is a candidate neighbor of every other ship, as before the grid
+        brute.nearby_ships = lambda x, y, radius, ships=brute.ships: ships
+        before = ticks_per_second(brute, ticks)
+        after = ticks_per_second(make_manager(n_ships), ticks)
+        print(f"{n_ships:>6} ships: before {before:8.2f} ticks/s, after {after:8.2f} ticks/s ({after / before:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
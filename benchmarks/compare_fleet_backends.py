@@ -0,0 +1,98 @@
+"""
+Replays a recorded scenario with the per-ship and vectorized ShipManager
+backends, reports the largest position difference and ticks/sec of each.
+
+Two checks, both must pass:
+- over the first SHORT_TICKS ticks, no ship is ever more than MAX_SHORT_DEVIATION
+  px (a ship width) from where the per-ship backend puts it;
+- over all TICKS ticks, the vectorized backend stays within 1.5x the difference
+  between replaying the per-ship path in forward and reverse ship order. The
+  per-ship path is itself sensitive to update order, and small differences
+  compound once ships interact, so this envelope grows over the run.
+
+Run from the repository root:
+    python -m benchmarks.compare_fleet_backends
+"""
+import random
+import time
+
+import numpy as np
+import pygame
+
+from coastlines.svg_parser import svg_to_points
+from port import Port
+from route import Route
+from route_manager import RouteManager
+from ship import SHIP_WIDTH, Ship
+from ship_manager import ShipManager
+from sim_clock import SimulationClock
+
+SCREEN_SIZE = (1280, 720)
+TICKS = 200
+SHORT_TICKS = 10
+MAX_SHORT_DEVIATION = SHIP_WIDTH
+
+
+def record_scenario(ships_per_route=8, seed=0):
+    """Initial ship states (position, velocity, route) leaving three ports on the islands map"""
+    rng = random.Random(seed)
+    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
+    route_manager = RouteManager(*SCREEN_SIZE, None)
+    graph = route_manager.create_ocean_graph(coastlines, None, grid_gap=20, min_dist=20)
+    ports = [Port(330.3, 168.0, capacity=20), Port(321.588, 321.012, capacity=20), Port(759.288, 371.712, capacity=20)]
+    route_manager.generate_routes(ports, graph)
+
+    states = []
+    for (departure, destination), path in route_manager.routes.items():
+        for _ in range(ships_per_route):
+            ship = Ship(departure.x, departure.y)
+            random.seed(rng.random())
+            ship.undock(Route(path, departure, destination))
+            states.append((ship.x, ship.y, ship.vx, ship.vy, list(ship.route)))
+    return coastlines, states
+
+
+def replay(backend, coastlines, states, ticks, reverse=False):
+    clock = SimulationClock()
+    manager = ShipManager(SCREEN_SIZE, pygame.Surface(SCREEN_SIZE), {}, backend=backend, clock=clock)
+    manager.show_ship_sensors = False
+    ships = []
+    for x, y, vx, vy, route in states:
+        ship = Ship(x, y, list(route))
+        ship.vx, ship.vy = vx, vy
+        ships.append(ship)
+    for ship in (ships[::-1] if reverse else ships):
+        manager.add_ship(ship)
+
+    trajectory = np.empty((ticks, len(ships), 2))
+    start = time.perf_counter()
+    for t in range(ticks):
+        manager.update_ships(coastlines)
+        clock.advance()
+        trajectory[t] = [(ship.x, ship.y) for ship in ships]
+    return trajectory, ticks / (time.perf_counter() - start)
+
+
+def main():
+    coastlines, states = record_scenario()
+    reference, python_rate = replay("python", coastlines, states, TICKS)
+    reordered, _ = replay("python", coastlines, states, TICKS, reverse=True)
+    trajectory, vectorized_rate = replay("vectorized", coastlines, states, TICKS)
+    tolerance = np.linalg.norm(reordered - reference, axis=2).max(axis=1)
+    deviation = np.linalg.norm(trajectory - reference, axis=2).max(axis=1)
+    for t in (0, 9, 49, 99, TICKS - 1):
+        print(f"tick {t + 1:>4}: vectorized max deviation {deviation[t]:7.3f} px, "
+              f"per-ship reordered {tolerance[t]:7.3f} px")
+    print(f"{len(states)} ships: python {python_rate:7.1f} ticks/s, vectorized {vectorized_rate:7.1f} ticks/s")
+    short = deviation[:SHORT_TICKS].max()
+    print(f"first {SHORT_TICKS} ticks: max deviation {short:.3f} px, bound {MAX_SHORT_DEVIATION:.1f} px: "
+          f"{'within' if short <= MAX_SHORT_DEVIATION else 'exceeds'}")
+    within = np.all(deviation <= np.maximum(tolerance, 1e-6) * 1.5)
+    print(f"all {TICKS} ticks: max deviation {deviation.max():.3f} px, reorder envelope: "
+          f"{'within' if within else 'exceeds'}")
+    if short > MAX_SHORT_DEVIATION or not within:
+        raise SystemExit("vectorized backend does not match the per-ship backend")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Settings and timing helper shared by the highway PSO benchmarks.
+
+OPTIMIZER_PARAMS mirrors the optimize_highways call in main.py; keep the two
+in step. OBJECTIVE_PARAMS is the part objective_factory takes besides M.
+"""
+import time
+
+SCREEN_SIZE = (1280, 720)
+# Same settings as the optimizer run from main.py
+OPTIMIZER_PARAMS = dict(M=2, R=800, particles=40, big_penalty=1e7, c2=1.8, alpha_water=1.0, alpha_highway=0.3,
+                        beta_switch=1.0, lambda_infrastructure=0.8)
+OBJECTIVE_PARAMS = {key: OPTIMIZER_PARAMS[key] for key in ("R", "big_penalty", "alpha_water", "alpha_highway",
+                                                           "beta_switch", "lambda_infrastructure")}
+HIGHWAY_NODES = OPTIMIZER_PARAMS["M"]
+PARTICLES = OPTIMIZER_PARAMS["particles"]
+
+
+def evals_per_second(objective, X, min_time=1.0):
+    """Objective evaluations per second over X for at least min_time seconds, and the last costs"""
+    evals, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        costs = objective(X)
+        evals += len(X)
+    return evals / (time.perf_counter() - start), costs
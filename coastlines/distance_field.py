@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+from scipy.ndimage import distance_transform_edt
+
+from utils.math_utils import points_on_land
+
+
+class DistanceField:
+    """
+    Signed distance to the coastline sampled on a regular grid, plus its gradient.
+
+    Distances are positive in water and negative on land. The gradient points
+    away from land, so it is the direction to push a ship that gets too close.
+    Grid cell (row, col) is centered on ((col + 0.5) * resolution, (row + 0.5) * resolution).
+    """
+
+    def __init__(self, distance, grad_x, grad_y, resolution):
+        self.distance = distance
+        self.grad_x = grad_x
+        self.grad_y = grad_y
+        self.resolution = resolution
+        self.rows, self.cols = distance.shape
+
+    @classmethod
+    def build(cls, coastlines, width, height, resolution=2.0):
+        """Rasterize the land polygons at `resolution` px per cell and run the distance transform"""
+        cols = math.ceil(width / resolution)
+        rows = math.ceil(height / resolution)
+        cx = (np.arange(cols) + 0.5) * resolution
+        cy = (np.arange(rows) + 0.5) * resolution
+        gx, gy = np.meshgrid(cx, cy)
+        land = points_on_land(np.column_stack((gx.ravel(), gy.ravel())), coastlines).reshape(rows, cols)
+
+        if land.any():
+            # Distance from cell centers to the closest cell of the other kind, measured to the shared edge
+            to_land = distance_transform_edt(~land, sampling=resolution) - resolution / 2
+            to_water = distance_transform_edt(land, sampling=resolution) - resolution / 2
+            distance = np.where(land, -to_water, to_land)
+        else:
+            distance = np.full((rows, cols), np.inf)
+
+        grad_y, grad_x = np.gradient(np.where(np.isinf(distance), 0, distance), resolution)
+        return cls(distance, grad_x, grad_y, resolution)
+
+    def _corners(self, x, y):
+        fx = min(max(x / self.resolution - 0.5, 0), self.cols - 1)
+        fy = min(max(y / self.resolution - 0.5, 0), self.rows - 1)
+        c0 = min(int(fx), self.cols - 2) if self.cols > 1 else 0
+        r0 = min(int(fy), self.rows - 2) if self.rows > 1 else 0
+        return r0, c0, fx - c0, fy - r0
+
+    def _bilinear(self, grid, r0, c0, tx, ty):
+        r1 = min(r0 + 1, self.rows - 1)
+        c1 = min(c0 + 1, self.cols - 1)
+        top = grid[r0, c0] * (1 - tx) + grid[r0, c1] * tx
+        bottom = grid[r1, c0] * (1 - tx) + grid[r1, c1] * tx
+        return float(top * (1 - ty) + bottom * ty)
+
+    def sample(self, x, y):
+        """Return (signed distance, gradient x, gradient y) at (x, y)"""
+        r0, c0, tx, ty = self._corners(x, y)
+        return (self._bilinear(self.distance, r0, c0, tx, ty),
+                self._bilinear(self.grad_x, r0, c0, tx, ty),
+                self._bilinear(self.grad_y, r0, c0, tx, ty))
+
+    def sample_many(self, xs, ys):
+        """Vectorized `sample` for arrays of positions"""
+        fx = np.clip(np.asarray(xs, dtype=float) / self.resolution - 0.5, 0, self.cols - 1)
+        fy = np.clip(np.asarray(ys, dtype=float) / self.resolution - 0.5, 0, self.rows - 1)
+        c0 = np.minimum(fx.astype(int), max(self.cols - 2, 0))
+        r0 = np.minimum(fy.astype(int), max(self.rows - 2, 0))
+        c1 = np.minimum(c0 + 1, self.cols - 1)
+        r1 = np.minimum(r0 + 1, self.rows - 1)
+        tx, ty = fx - c0, fy - r0
+
+        def bilinear(grid):
+            top = grid[r0, c0] * (1 - tx) + grid[r0, c1] * tx
+            bottom = grid[r1, c0] * (1 - tx) + grid[r1, c1] * tx
+            return top * (1 - ty) + bottom * ty
+
+        return bilinear(self.distance), bilinear(self.grad_x), bilinear(self.grad_y)
+
+    def save(self, path):
+        np.savez_compressed(path, distance=self.distance, grad_x=self.grad_x, grad_y=self.grad_y,
+                            resolution=self.resolution)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays(data)
+
+    def to_arrays(self):
+        return {'distance': self.distance, 'grad_x': self.grad_x, 'grad_y': self.grad_y,
+                'resolution': np.float64(self.resolution)}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['distance'], arrays['grad_x'], arrays['grad_y'], float(arrays['resolution']))
@@ -0,0 +1,127 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+def coastline_segments(coastlines):
+    """Return (p1, p2) arrays of shape (K, 2) for the open coastline polylines ships steer around"""
+    p1 = [p for coastline in coastlines for p in coastline[:-1]]
+    p2 = [p for coastline in coastlines for p in coastline[1:]]
+    if not p1:
+        return np.empty((0, 2)), np.empty((0, 2))
+    return np.array(p1, dtype=float), np.array(p2, dtype=float)
+
+
+def iter_segments(coastlines):
+    """(p1, p2) for every segment of every coastline"""
+    for coastline in coastlines:
+        yield from zip(coastline, coastline[1:])
+
+
+class SegmentIndex:
+    """
+    Static uniform grid over coastline segments, built once at map load.
+
+    Each segment is bucketed in every cell its bounding box overlaps, so a
+    query returns every segment that has a point within `radius` of the query
+    point (plus some that don't; callers keep their exact distance checks).
+    Segments come back in coastline order, same as iterating the coastlines.
+    """
+
+    def __init__(self, coastlines, cell_size=32):
+        self.cell_size = cell_size
+        self.segments = [(p1, p2) for coastline in coastlines for p1, p2 in zip(coastline, coastline[1:])]
+        self.p1, self.p2 = coastline_segments(coastlines)
+
+        self.cells = defaultdict(list)
+        for k, (p1, p2) in enumerate(self.segments):
+            cx0, cy0 = self.cell(min(p1[0], p2[0]), min(p1[1], p2[1]))
+            cx1, cy1 = self.cell(max(p1[0], p2[0]), max(p1[1], p2[1]))
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.cells[(cx, cy)].append(k)
+
+        self._build_csr()
+
+    def __len__(self):
+        return len(self.segments)
+
+    def cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _build_csr(self):
+        """Dense cell -> segment ids layout for the batched query"""
+        if not self.cells:
+            self.origin = (0, 0)
+            self.shape = (0, 0)
+            self.cell_start = np.zeros(1, dtype=int)
+            self.cell_segments = np.empty(0, dtype=int)
+            return
+        xs = [cx for cx, _ in self.cells]
+        ys = [cy for _, cy in self.cells]
+        self.origin = (min(xs), min(ys))
+        self.shape = (max(xs) - self.origin[0] + 1, max(ys) - self.origin[1] + 1)
+        counts = np.zeros(self.shape[0] * self.shape[1], dtype=int)
+        for (cx, cy), ids in self.cells.items():
+            counts[self._flat(cx, cy)] = len(ids)
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        self.cell_segments = np.empty(self.cell_start[-1], dtype=int)
+        for (cx, cy), ids in self.cells.items():
+            start = self.cell_start[self._flat(cx, cy)]
+            self.cell_segments[start:start + len(ids)] = ids
+
+    def _flat(self, cx, cy):
+        return (cx - self.origin[0]) * self.shape[1] + (cy - self.origin[1])
+
+    def query_ids(self, x, y, radius):
+        cx0, cy0 = self.cell(x - radius, y - radius)
+        cx1, cy1 = self.cell(x + radius, y + radius)
+        found = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                ids = self.cells.get((cx, cy))
+                if ids:
+                    found.update(ids)
+        return sorted(found)
+
+    def query(self, x, y, radius):
+        """(p1, p2) segments near (x, y)"""
+        return [self.segments[k] for k in self.query_ids(x, y, radius)]
+
+    def query_pairs(self, xs, ys, radius, chunk=200_000):
+        """
+        Batched query for many points. Yields (point index, segment index)
+        arrays, without duplicates, in chunks of roughly `chunk` points.
+        """
+        if len(self.segments) == 0 or len(xs) == 0:
+            return
+        span = int(math.floor(2 * radius / self.cell_size)) + 2
+        ox, oy = np.meshgrid(np.arange(span), np.arange(span), indexing='ij')
+        ox, oy = ox.ravel(), oy.ravel()
+        n_segments = len(self.segments)
+
+        for start in range(0, len(xs), chunk):
+            px = np.asarray(xs[start:start + chunk], dtype=float)
+            py = np.asarray(ys[start:start + chunk], dtype=float)
+            cx0 = np.floor((px - radius) / self.cell_size).astype(int) - self.origin[0]
+            cy0 = np.floor((py - radius) / self.cell_size).astype(int) - self.origin[1]
+            cx1 = np.floor((px + radius) / self.cell_size).astype(int) - self.origin[0]
+            cy1 = np.floor((py + radius) / self.cell_size).astype(int) - self.origin[1]
+
+            cx = cx0[:, None] + ox[None, :]
+            cy = cy0[:, None] + oy[None, :]
+            valid = (cx <= cx1[:, None]) & (cy <= cy1[:, None])
+            valid &= (cx >= 0) & (cy >= 0) & (cx < self.shape[0]) & (cy < self.shape[1])
+            point, offset = np.nonzero(valid)
+            flat = cx[point, offset] * self.shape[1] + cy[point, offset]
+            begin = self.cell_start[flat]
+            count = self.cell_start[flat + 1] - begin
+
+            point = np.repeat(point, count)
+            # Position of each pair within its cell's run of segment ids
+            within = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+            segment = self.cell_segments[np.repeat(begin, count) + within]
+
+            keys = np.unique(point.astype(np.int64) * n_segments + segment)
+            yield keys // n_segments + start, keys % n_segments
@@ -0,0 +1,381 @@
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from coastlines.segment_index import coastline_segments
+from ship import (ALIGNMENT_DISTANCE, ALIGNMENT_FACTOR, COASTLINE_TURN_FACTOR, COHESION_DISTANCE, COHESION_FACTOR,
+                  LINE_FOLLOW_COASTLINE_THRESHOLD, LINE_FOLLOW_TIME, MARGIN, MAX_VELOCITY, NEIGHBOR_DISTANCE, RANGE,
+                  ROUTE_FACTOR, ROUTE_WAYPOINT_DISTANCE, SEPARATION_DISTANCE, SEPARATION_FACTOR, TURN_FACTOR)
+from utils.math_utils import EPS
+
+# Follow point hyperparameters, same as reynold.kelvin_cohesion and reynold.line_cohesion
+KELVIN_DISTANCE = 30
+KELVIN_ANGLE = 50
+TANDEM_DISTANCE = 20.
+
+# Upper bound on (ship, segment) pairs materialised at once
+PAIR_CHUNK = 1_000_000
+
+
+def first_per_group(group, key):
+    """Index of the smallest `key` within each value of `group`"""
+    order = np.lexsort((key, group))
+    g = group[order]
+    first = np.ones(len(g), dtype=bool)
+    first[1:] = g[1:] != g[:-1]
+    return order[first]
+
+
+class Fleet:
+    """
+    Struct-of-arrays ship state, stepped with batched NumPy operations.
+
+    Mirrors Ship.boundary_update, line_follow_check, flocking, follow_route and move
+    for every ship at once. The arrays are authoritative while stepping; the Ship
+    objects are refreshed after each step so drawing and docking can keep using
+    `ship.x`, `ship.vx` and friends. Ships update simultaneously rather than one
+    after another, so results match the per-ship path within a tolerance.
+    """
+
+    def __init__(self, capacity=64):
+        self.ships = []
+        self.slot_of = {}
+        self.n = 0
+        self.coastlines = None
+        self.segment_index = None
+        self.distance_field = None
+        self.segments = (np.empty((0, 2)), np.empty((0, 2)))
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        def resized(name, fill, dtype=float, width=None):
+            shape = (capacity,) if width is None else (capacity, width)
+            arr = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                arr[:len(old)] = old
+            setattr(self, name, arr)
+
+        resized('x', 0.)
+        resized('y', 0.)
+        resized('vx', 0.)
+        resized('vy', 0.)
+        resized('line_follow', False, dtype=bool)
+        resized('line_follow_timeout', 0.)
+        # Waypoint cache: number of waypoints left and the last three of them (ships pop from the end)
+        resized('route_len', 0, dtype=int)
+        resized('waypoint1', np.nan, width=2)
+        resized('waypoint2', np.nan, width=2)
+        resized('waypoint3', np.nan, width=2)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.n
+
+    def add(self, ship):
+        if ship in self.slot_of:
+            return
+        if self.n == self.capacity:
+            self._allocate(self.capacity * 2)
+        slot = self.n
+        self.n += 1
+        self.ships.append(ship)
+        self.slot_of[ship] = slot
+        self.x[slot] = ship.x
+        self.y[slot] = ship.y
+        self.vx[slot] = ship.vx
+        self.vy[slot] = ship.vy
+        self.line_follow[slot] = ship.line_follow
+        self.line_follow_timeout[slot] = ship.line_follow_timeout
+        self.refresh_route(slot)
+
+    def remove(self, ship):
+        slot = self.slot_of.pop(ship, None)
+        if slot is None:
+            return
+        last = self.n - 1
+        if slot != last:
+            # Move the last ship into the freed slot
+            moved = self.ships[last]
+            self.ships[slot] = moved
+            self.slot_of[moved] = slot
+            for arr in (self.x, self.y, self.vx, self.vy, self.line_follow, self.line_follow_timeout,
+                        self.route_len, self.waypoint1, self.waypoint2, self.waypoint3):
+                arr[slot] = arr[last]
+        self.ships.pop()
+        self.n = last
+
+    def refresh_route(self, slot):
+        ship = self.ships[slot]
+        if ship.route is not None and len(ship.route) == 0:
+            ship.route = None
+        route = ship.route or []
+        self.route_len[slot] = len(route)
+        for k, arr in enumerate((self.waypoint1, self.waypoint2, self.waypoint3), start=1):
+            arr[slot] = route[-k] if len(route) >= k else (np.nan, np.nan)
+
+    def set_coastlines(self, coastlines, segment_index=None):
+        self.segment_index = segment_index
+        if segment_index is not None:
+            self.coastlines = coastlines
+            self.segments = segment_index.p1, segment_index.p2
+        elif coastlines is not self.coastlines:
+            self.coastlines = coastlines
+            self.segments = coastline_segments(coastlines)
+
+    def sync_ships(self):
+        """Copy array state back onto the Ship objects"""
+        n = self.n
+        for ship, x, y, vx, vy, lf, timeout in zip(self.ships, self.x[:n].tolist(), self.y[:n].tolist(),
+                                                   self.vx[:n].tolist(), self.vy[:n].tolist(),
+                                                   self.line_follow[:n].tolist(),
+                                                   self.line_follow_timeout[:n].tolist()):
+            ship.x = x
+            ship.y = y
+            ship.vx = vx
+            ship.vy = vy
+            ship.line_follow = lf
+            ship.line_follow_timeout = timeout
+
+    def step(self, coastlines, w, h, now, segment_index=None, distance_field=None):
+        """Advance every ship one tick; `now` is the current time of the ships' clock"""
+        if self.n == 0:
+            return
+        self.set_coastlines(coastlines, segment_index)
+        self.distance_field = distance_field
+        self.boundary_update(w, h)
+        self.line_follow_check(now)
+        self.flocking(now)
+        self.follow_route()
+        self.move()
+        self.sync_ships()
+
+    def boundary_update(self, w, h):
+        n = self.n
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        vx -= TURN_FACTOR * (x > w - MARGIN)
+        vy -= TURN_FACTOR * (y > h - MARGIN)
+        vx += TURN_FACTOR * (x < MARGIN)
+        vy += TURN_FACTOR * (y < MARGIN)
+
+    def ship_segment_pairs(self, ships, radius):
+        """
+        Yield (ship slot, segment index) pair arrays for the given ship slots, in bounded chunks.
+        With a segment index only segments within `radius` are paired, otherwise all of them.
+        """
+        k = len(self.segments[0])
+        if k == 0 or len(ships) == 0:
+            return
+        if self.segment_index is not None:
+            for local, segment in self.segment_index.query_pairs(self.x[ships], self.y[ships], radius):
+                yield ships[local], segment
+            return
+        per_chunk = max(1, PAIR_CHUNK // k)
+        for start in range(0, len(ships), per_chunk):
+            chunk = ships[start:start + per_chunk]
+            yield np.repeat(chunk, k), np.tile(np.arange(k), len(chunk))
+
+    def line_follow_check(self, now):
+        n = self.n
+        x, y = self.x[:n], self.y[:n]
+        theta = np.arctan2(self.vy[:n], self.vx[:n])
+        sensor_x = np.cos(theta + math.pi / 2) * LINE_FOLLOW_COASTLINE_THRESHOLD
+        sensor_y = np.sin(theta + math.pi / 2) * LINE_FOLLOW_COASTLINE_THRESHOLD
+        a_r = sensor_y / (sensor_x + 1e-10)
+        b_r = y - a_r * x
+
+        p1, p2 = self.segments
+        right = np.zeros(n, dtype=bool)
+        left = np.zeros(n, dtype=bool)
+        for s, k in self.ship_segment_pairs(np.flatnonzero(~self.line_follow[:n]),
+                                          LINE_FOLLOW_COASTLINE_THRESHOLD):
+            q1, q2 = p1[k], p2[k]
+            line_a = (q2[:, 1] - q1[:, 1]) / (q2[:, 0] - q1[:, 0] + 1e-10)
+            line_b = q1[:, 1] - line_a * q1[:, 0]
+            ix = (line_b - b_r[s]) / (a_r[s] - line_a + EPS)
+            iy = a_r[s] * ix + b_r[s]
+            dx, dy = ix - x[s], iy - y[s]
+            hit = np.sqrt(dx ** 2 + dy ** 2) <= LINE_FOLLOW_COASTLINE_THRESHOLD
+            hit &= (ix >= np.minimum(q1[:, 0], q2[:, 0])) & (ix <= np.maximum(q1[:, 0], q2[:, 0]))
+            hit &= (iy >= np.minimum(q1[:, 1], q2[:, 1])) & (iy <= np.maximum(q1[:, 1], q2[:, 1]))
+            is_right = dx * sensor_x[s] + dy * sensor_y[s] > 0
+            right[s[hit & is_right]] = True
+            left[s[hit & ~is_right]] = True
+
+        start = right & left
+        self.line_follow[:n][start] = True
+        self.line_follow_timeout[:n][start] = now + LINE_FOLLOW_TIME
+
+    def follow_points(self, i, j, angle_offset):
+        """For each ship in `i`, the closest ship in `j` it could follow, as in reynold.find_ship_to_follow"""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        sm = np.sqrt(vx[i] ** 2 + vy[i] ** 2) + 1e-10
+        om = np.sqrt(dx ** 2 + dy ** 2) + 1e-10
+        in_front = (vx[i] / sm) * (dx / om) + (vy[i] / sm) * (dy / om) - angle_offset > 0
+        has_route = self.route_len > 0
+        routed = ~(has_route[i] & ~has_route[j])
+        same_heading = vx[i] * vx[j] + vy[i] * vy[j] > 0
+        ok = in_front & routed & same_heading
+        i, j = i[ok], j[ok]
+        best = first_per_group(i, np.sqrt((x[j] - x[i]) ** 2 + (y[j] - y[i]) ** 2))
+        leader_i, leader_j = i[best], j[best]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            theta_v = np.arctan(vy[leader_j] / vx[leader_j])
+        theta_v = np.where(vx[leader_j] > 0, theta_v + math.pi, theta_v)
+        return leader_i, leader_j, theta_v
+
+    def flocking(self, now):
+        n = self.n
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        line_follow, timeout = self.line_follow[:n], self.line_follow_timeout[:n]
+
+        pairs = cKDTree(np.column_stack((x, y))).query_pairs(NEIGHBOR_DISTANCE, output_type='ndarray')
+        i = np.concatenate((pairs[:, 0], pairs[:, 1]))
+        j = np.concatenate((pairs[:, 1], pairs[:, 0]))
+        d = np.sqrt((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2)
+
+        # Don't flock with ships whose route vectors differ by more than 90 degrees
+        has_route = self.route_len[:n] > 0
+        sx, sy = self.waypoint1[:n, 0] - x, self.waypoint1[:n, 1] - y
+        both_routed = has_route[i] & has_route[j]
+        theta_ok = ~both_routed | (np.where(both_routed, sx[i] * sx[j] + sy[i] * sy[j], 1) > 0)
+
+        sep = d < SEPARATION_DISTANCE
+        ali = (d < ALIGNMENT_DISTANCE) & theta_ok
+        coh = (d < COHESION_DISTANCE) & theta_ok
+
+        # Follow points are computed from the state before this step's velocity changes
+        ci, cj = i[coh], j[coh]
+        kelvin = np.full((n, 2), np.nan)
+        leader_i, leader_j, theta_v = self.follow_points(ci, cj, angle_offset=0.1)
+        theta_l = theta_v + math.radians(KELVIN_ANGLE)
+        theta_r = theta_v - math.radians(KELVIN_ANGLE)
+        x_l = x[leader_j] + np.cos(theta_l) * KELVIN_DISTANCE
+        y_l = y[leader_j] + np.sin(theta_l) * KELVIN_DISTANCE
+        x_r = x[leader_j] + np.cos(theta_r) * KELVIN_DISTANCE
+        y_r = y[leader_j] + np.sin(theta_r) * KELVIN_DISTANCE
+        dl = np.sqrt((x[leader_i] - x_l) ** 2 + (y[leader_i] - y_l) ** 2)
+        dr = np.sqrt((x[leader_i] - x_r) ** 2 + (y[leader_i] - y_r) ** 2)
+        kelvin[leader_i, 0] = np.where(dl < dr, x_l, x_r)
+        kelvin[leader_i, 1] = np.where(dl < dr, y_l, y_r)
+
+        line = np.full((n, 2), np.nan)
+        leader_i, leader_j, theta_v = self.follow_points(ci, cj, angle_offset=0)
+        line[leader_i, 0] = x[leader_j] + np.cos(theta_v) * TANDEM_DISTANCE
+        line[leader_i, 1] = y[leader_j] + np.sin(theta_v) * TANDEM_DISTANCE
+
+        # Separation
+        vx += np.bincount(i[sep], weights=x[i[sep]] - x[j[sep]] + 1e-12, minlength=n) * SEPARATION_FACTOR
+        vy += np.bincount(i[sep], weights=y[i[sep]] - y[j[sep]] + 1e-12, minlength=n) * SEPARATION_FACTOR
+
+        # Alignment
+        count = np.bincount(i[ali], minlength=n)
+        has_ali = count > 0
+        avg_vx = np.bincount(i[ali], weights=vx[j[ali]], minlength=n)[has_ali] / count[has_ali]
+        avg_vy = np.bincount(i[ali], weights=vy[j[ali]], minlength=n)[has_ali] / count[has_ali]
+        vx[has_ali] += (avg_vx - vx[has_ali]) * ALIGNMENT_FACTOR
+        vy[has_ali] += (avg_vy - vy[has_ali]) * ALIGNMENT_FACTOR
+
+        active = line_follow & (now < timeout)
+
+        # Line following ships tell their cohesion neighbors to line follow as well
+        notify = active[ci] & ~line_follow[cj]
+        notified = np.zeros(n, dtype=bool)
+        notified[cj[notify]] = True
+        new_timeout = np.full(n, -np.inf)
+        np.maximum.at(new_timeout, cj[notify], timeout[ci[notify]])
+
+        pull = active & ~np.isnan(line[:, 0])
+        vx[pull] += (line[pull, 0] - x[pull]) * COHESION_FACTOR
+        vy[pull] += (line[pull, 1] - y[pull]) * COHESION_FACTOR
+
+        line_follow[~active & (now >= timeout)] = False
+        pull = ~active & ~np.isnan(kelvin[:, 0])
+        vx[pull] += (kelvin[pull, 0] - x[pull]) * COHESION_FACTOR
+        vy[pull] += (kelvin[pull, 1] - y[pull]) * COHESION_FACTOR
+
+        line_follow[notified] = True
+        timeout[notified] = new_timeout[notified]
+
+    def follow_route(self):
+        n = self.n
+        x, y = self.x[:n], self.y[:n]
+        length = self.route_len[:n]
+        w1, w2, w3 = self.waypoint1[:n], self.waypoint2[:n], self.waypoint3[:n]
+
+        def dist(w):
+            return np.sqrt((x - w[:, 0]) ** 2 + (y - w[:, 1]) ** 2)
+
+        has = length > 0
+        with np.errstate(invalid='ignore'):
+            pop1 = has & (length >= 2) & (dist(w2) < dist(w1))
+            last = np.where(pop1[:, None], w2, w1)
+            after = np.where(pop1[:, None], w3, w2)
+            pop2 = has & (length - pop1 > 1) & (dist(last) <= ROUTE_WAYPOINT_DISTANCE)
+        target = np.where(pop2[:, None], after, last)
+
+        self.vx[:n][has] += (target[has, 0] - x[has]) * ROUTE_FACTOR
+        self.vy[:n][has] += (target[has, 1] - y[has]) * ROUTE_FACTOR
+
+        pops = pop1.astype(int) + pop2
+        for slot in np.flatnonzero(pops).tolist():
+            route = self.ships[slot].route
+            for _ in range(pops[slot]):
+                route.pop()
+            self.refresh_route(slot)
+
+    def coastline_push(self):
+        """Sum of (ship - closest point) over coastline segments within RANGE, as in Ship.move"""
+        n = self.n
+        x, y = self.x[:n], self.y[:n]
+        p1, p2 = self.segments
+        push_x = np.zeros(n)
+        push_y = np.zeros(n)
+        for s, k in self.ship_segment_pairs(np.arange(n), RANGE):
+            q1, q2 = p1[k], p2[k]
+            a = (q2[:, 1] - q1[:, 1]) / (q2[:, 0] - q1[:, 0] + 1e-10)
+            b = q1[:, 1] - a * q1[:, 0]
+            px = (x[s] + a * (y[s] - b)) / (1 + a ** 2)
+            py = a * px + b
+
+            # Clamp to the segment end with the smaller or larger x, as in Ship.move
+            low_end = np.where((q1[:, 0] < q2[:, 0])[:, None], q1, q2)
+            high_end = np.where((q1[:, 0] > q2[:, 0])[:, None], q1, q2)
+            below = px < np.minimum(q1[:, 0], q2[:, 0])
+            above = ~below & (px > np.maximum(q1[:, 0], q2[:, 0]))
+            px = np.where(below, low_end[:, 0], np.where(above, high_end[:, 0], px))
+            py = np.where(below, low_end[:, 1], np.where(above, high_end[:, 1], py))
+
+            near = np.sqrt((px - x[s]) ** 2 + (py - y[s]) ** 2) <= RANGE
+            push_x += np.bincount(s[near], weights=x[s[near]] - px[near], minlength=n)
+            push_y += np.bincount(s[near], weights=y[s[near]] - py[near], minlength=n)
+        return push_x, push_y
+
+    def move(self):
+        n = self.n
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+
+        if self.distance_field is not None:
+            d, grad_x, grad_y = self.distance_field.sample_many(x, y)
+            push_x = np.where(d <= RANGE, grad_x, 0)
+            push_y = np.where(d <= RANGE, grad_y, 0)
+        else:
+            push_x, push_y = self.coastline_push()
+
+        # Constant strength push away from the coastline
+        mag = np.sqrt(push_x ** 2 + push_y ** 2)
+        pushed = mag != 0
+        vx[pushed] += push_x[pushed] / mag[pushed] * 100 * COASTLINE_TURN_FACTOR
+        vy[pushed] += push_y[pushed] / mag[pushed] * 100 * COASTLINE_TURN_FACTOR
+
+        velocity = np.sqrt(vx ** 2 + vy ** 2)
+        fast = velocity > MAX_VELOCITY
+        factor = 1 / velocity[fast] * MAX_VELOCITY
+        vx[fast] *= factor
+        vy[fast] *= factor
+
+        x += vx
+        y += vy
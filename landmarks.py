@@ -0,0 +1,71 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from ocean_graph import OceanGraph
+
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks, triangle inequality) preprocessing for an OceanGraph.
+
+    Stores the exact graph distance from a few landmark nodes to every node.
+    For any nodes v and t, |d(l, t) - d(l, v)| <= d(v, t) for every landmark
+    l, which gives an admissible A* heuristic that is usually much tighter
+    than the straight-line distance around islands.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.distances = np.asarray(distances, dtype=np.float64)  # (landmarks, nodes)
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    @classmethod
+    def build(cls, graph: OceanGraph, count=8):
+        """
+        Pick `count` landmarks by farthest-point selection: each new landmark is the
+        node furthest, by graph distance, from the ones already chosen in its part of
+        the ocean. Landmarks are shared out between connected components by size, so
+        small enclosed bits of water don't take them from the open sea.
+        """
+        n = len(graph)
+        if n == 0 or count <= 0:
+            return cls(np.empty(0), np.empty((0, n)))
+        matrix = csr_matrix((graph.weights, graph.indices, graph.indptr), shape=(n, n))
+        _, labels = connected_components(matrix, directed=False)
+        sizes = np.bincount(labels)
+        order = np.argsort(-sizes, kind='stable')
+        quotas = np.floor(count * sizes[order] / n).astype(int)
+        quotas[0] += min(count, n) - quotas.sum()
+
+        landmarks, rows = [], []
+        for component, quota in zip(order, quotas):
+            if quota <= 0:
+                continue
+            members = labels == component
+            # Start from the node furthest from an arbitrary member, then keep spreading out
+            seed = dijkstra(matrix, indices=int(np.argmax(members)))
+            closest = np.where(members, seed, -1)
+            for _ in range(min(quota, int(members.sum()))):
+                landmarks.append(int(np.argmax(closest)))
+                rows.append(dijkstra(matrix, indices=landmarks[-1]))
+                closest = np.where(members, np.minimum(closest, rows[-1]), -1)
+        return cls(landmarks, np.vstack(rows))
+
+    def heuristic(self, t):
+        """Lower bound on the distance from every node to node `t`, as an array"""
+        if len(self.landmarks) == 0:
+            return np.zeros(self.distances.shape[1])
+        with np.errstate(invalid='ignore'):
+            bounds = np.abs(self.distances[:, t][:, None] - self.distances)
+        # inf - inf: the landmark reaches neither node, so it bounds nothing
+        return np.nan_to_num(bounds, nan=0.0, posinf=np.inf).max(axis=0)
+
+    def to_arrays(self):
+        return {'landmarks': self.landmarks, 'distances': self.distances}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['landmarks'], arrays['distances'])
@@ -1,22 +1,39 @@
-from queue import Queue
+import os
+from queue import Empty, Queue
 from threading import Event, Thread
 
 import numpy as np
 import pygame
 import pygame_gui
 
-from coastlines.svg_parser import svg_to_points
 from order import Order
 from port import Port
-from PSO.highway_optimizer import optimize_highways
+from PSO.highway_optimizer import optimize_highways, pool_workers
+from PSO.highway_store import HighwayStore
 from PSO.optimizer_worker import run_optimizer_task
-from route_manager import RouteManager
-from ship import Ship
-from ship_manager import ShipManager
-from utils.order_utils import add_random_orders
+from render_cache import RenderCache
+from render_layers import LayerCompositor
+from simulation import Simulation
+from utils.order_utils import add_random_orders, collect_ports_and_orders
 from utils.math_utils import distance, get_closest_coastpoint
 
 SCREEN_WIDTH, SCREEN_HEIGHT = 1280, 720
+# Ship sprites are pre-rotated in steps of this many degrees
+SHIP_SPRITE_ANGLE_STEP = 5
+# "python" updates ships one by one, "vectorized" steps the whole fleet with NumPy
+SHIP_BACKEND = "python"
+# Coastline repulsion from a precomputed distance field instead of nearby segments
+USE_COAST_DISTANCE_FIELD = False
+DISTANCE_FIELD_RESOLUTION = 2.0  # px per cell
+MAP_PATH = 'coastlines/svg/islands.svg'
+MAP_STEP, MAP_SCALE = 10, 1.2
+# Routes are straightened wherever shortcuts stay this many px from the coast (None keeps grid routes)
+ROUTE_CLEARANCE = 10
+# Routes for new ports are computed by this many background processes (0 computes them in the frame)
+ROUTE_WORKERS = 2
+# Highway optimizer particles of large runs are evaluated in this many processes, leaving a core for the
+# render loop; small runs and single-CPU machines evaluate them in the optimizer thread (see pool_workers)
+HIGHWAY_WORKERS = max(1, (os.cpu_count() or 1) - 1)
 
 route_colors = [
     (255, 100, 100),  # red-ish
@@ -28,32 +45,36 @@ route_colors = [
 ]
 
 
-def get_hard_coded_ports_and_orders():
-    port1 = Port(330.3, 168.0, capacity=20)
-    port2 = Port(321.588, 321.012, capacity=20)
-    port3 = Port(759.288, 371.712, capacity=20)
-    order1 = Order(destination=port3, containers=3)
-    order2 = Order(destination=port3, containers=3)
-    port1.add_order(order1)
-    port2.add_order(order2)
+def draw_land(surface, coastlines):
+    surface.fill((0, 105, 148))
+    for c in coastlines:
+        pygame.draw.polygon(surface, (228, 200, 148), c)
 
-    return [port1, port2, port3]
 
+def draw_highways(surface, highway_nodes, highway_edges, all_nodes_for_draw, order_paths_xy):
+    if highway_nodes is None or all_nodes_for_draw is None or highway_edges is None:
+        return
 
-def collect_ports_and_orders(ports):
-    '''
-    returns pair of:
-    ports_xy: List of (x,y) tuples
-    orders: List of (origin_index, dest_index, containers)
-    '''
-    ports_xy = [(port.x, port.y) for port in ports]
-    orders = []
-    for origin_index, port in enumerate(ports):
-        for order in port.orders:
-            dest_index = ports.index(order.destination)
-            orders.append((origin_index, dest_index, order.containers))
+    for edge in highway_edges:
+        u, v = edge
+        start_pos = all_nodes_for_draw[u]
+        end_pos = all_nodes_for_draw[v]
+        pygame.draw.line(surface, (255, 255, 255), start_pos, end_pos, 3)
 
-    return ports_xy, orders
+    for node in highway_nodes:
+        pygame.draw.circle(surface, (255, 255, 255), (int(node[0]), int(node[1])), 5)
+
+    if order_paths_xy is not None:
+        for i, poly in enumerate(order_paths_xy):
+            color = route_colors[i % len(route_colors)]
+            for a, b in zip(poly, poly[1:]):
+                pygame.draw.line(
+                    surface,
+                    color,
+                    (a[0], a[1]),
+                    (b[0], b[1]),
+                    5,
+                )
 
 
 def main():
@@ -62,6 +83,7 @@ def main():
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     manager = pygame_gui.UIManager((SCREEN_WIDTH, SCREEN_HEIGHT), "theme.json")
     clock = pygame.time.Clock()
+    render_cache = RenderCache(angle_step=SHIP_SPRITE_ANGLE_STEP)
     running = True
 
     should_add_random_orders = False
@@ -75,8 +97,18 @@ def main():
     show_route = True
     dt = 0
     creating_order = False
-    route_manager = RouteManager(SCREEN_WIDTH, SCREEN_HEIGHT, screen)
-    ship_manager = ShipManager((SCREEN_WIDTH, SCREEN_HEIGHT), screen, route_manager.routes)
+
+    # The engine owns the world; this loop handles input and renders its state
+    sim = Simulation(SCREEN_WIDTH, SCREEN_HEIGHT, MAP_PATH, map_step=MAP_STEP, map_scale=MAP_SCALE,
+                     grid_gap=20, min_dist=20, ship_backend=SHIP_BACKEND,
+                     use_distance_field=USE_COAST_DISTANCE_FIELD,
+                     distance_field_resolution=DISTANCE_FIELD_RESOLUTION, route_clearance=ROUTE_CLEARANCE,
+                     route_workers=ROUTE_WORKERS)
+    route_manager = sim.route_manager
+    ship_manager = sim.ship_manager
+    coastlines = sim.coastlines
+    coast_index = sim.coast_index
+    graph = sim.graph
 
     # TODO: Opmtimization state: move from main
     highway_nodes = None
@@ -87,19 +119,28 @@ def main():
     optimize_result_queue = Queue()
     optimize_cancel_event = Event()
     optimizer_thread = None
+    highway_version = 0  # bumped when a new optimizer result arrives
+    optimize_status = ""  # progress of the running optimization
+    highway_store = HighwayStore()  # best layouts of earlier runs, to start new runs from
+    optimize_scenario = None  # (ports_xy, orders) of the running optimization
 
     port_mode = False
     capacities = [10, 20, 30]
     capacity_index = 0
 
-    coastlines = svg_to_points('coastlines/svg/islands.svg', step=10, scale=1.2)
-
-    graph, weights = route_manager.create_ocean_graph(coastlines, screen, grid_gap=20, min_dist=20)
-
     # ship_manager.spawn_random_ships(coastlines)
-    ports = []
+    ports = sim.ports
     # ports = get_hard_coded_ports_and_orders()
 
+    # Static layers are pre-rendered and only redrawn when their inputs change
+    layers = LayerCompositor((SCREEN_WIDTH, SCREEN_HEIGHT))
+    layers.add_layer("land", lambda surf: draw_land(surf, coastlines), transparent=False)
+    layers.add_layer("graph", lambda surf: route_manager.draw_graph(graph, surf))
+    layers.add_layer("routes", route_manager.draw_routes, version=lambda: route_manager.routes_version)
+    layers.add_layer("highways",
+                     lambda surf: draw_highways(surf, highway_nodes, highway_edges, all_nodes_for_draw, order_paths_xy),
+                     version=lambda: highway_version)
+
     ### Button ###
     btn_toggle_layer_size = 45
     btn_toggle_layer_rect = pygame.Rect(SCREEN_WIDTH - btn_toggle_layer_size - 20, 20, btn_toggle_layer_size, btn_toggle_layer_size)
@@ -170,7 +211,10 @@ def main():
                 if event.key == pygame.K_y:
                     ship_manager.toggle_send_ships_immidiately()
                 if event.key == pygame.K_h:
-                    if not optimizing:
+                    if optimizing:
+                        # Stop early; the best layout so far arrives as the result
+                        optimize_cancel_event.set()
+                    else:
                         ports_xy, orders = collect_ports_and_orders(ports)
                         bbox_min = np.array([0.0, 0.0])
                         bbox_max = np.array([SCREEN_WIDTH, SCREEN_HEIGHT])
@@ -190,9 +234,15 @@ def main():
                             alpha_highway=0.3,
                             beta_switch=1.0,
                             lambda_infrastructure=0.8,
+                            patience=15,  # stop after this many iterations without improvement
                         )
+                        kwargs["workers"] = pool_workers(HIGHWAY_WORKERS, kwargs["particles"], orders)
+                        # Start around the best layout of this or the most similar earlier scenario
+                        kwargs["init_nodes"] = highway_store.lookup(ports_xy, orders, kwargs["M"])
+                        optimize_scenario = (ports_xy, orders)
                         optimize_cancel_event.clear()
                         optimizing = True
+                        optimize_status = ""
 
                         optimizer_thread = Thread(
                             target=run_optimizer_task,
@@ -200,7 +250,8 @@ def main():
                             daemon=True
                         )
                         optimizer_thread.start()
-                        print("[Highways] Optimization started...")
+                        print("[Highways] Optimization started" +
+                              (" from an earlier layout..." if kwargs["init_nodes"] is not None else "..."))
 
                 if event.key == pygame.K_UP:
                     capacity_index = (capacity_index + 1) % len(capacities)
@@ -209,15 +260,10 @@ def main():
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if port_mode:
-                    closest_coastpoint = get_closest_coastpoint(coastlines)
+                    closest_coastpoint = get_closest_coastpoint(coastlines, coast_index)
                     port = Port(closest_coastpoint[0], closest_coastpoint[1], capacities[capacity_index], radius=10)
-                    for _ in range(5):
-                        ship = Ship(port.x, port.y)
-                        ship_manager.dock_ship(port, ship)
-                    ports.append(port)
-
-                    # Generate routes for each new port added
-                    route_manager.generate_routes(ports, graph, weights)
+                    # Docks ships at the port and generates routes for it
+                    sim.add_port(port)
                 else:
                     mouse_x, mouse_y = pygame.mouse.get_pos()
                     for port in ports:
@@ -234,16 +280,14 @@ def main():
 
             manager.process_events(event)
 
-        screen.fill((0, 105, 148))
-
-        for c in coastlines:
-            pygame.draw.polygon(screen, (228, 200, 148), c)
+        layers.blit(screen, "land")
 
-        ship_manager.update_ships(coastlines)
-        ship_manager.update_ports(ports, route_manager.routes)
+        sim.step(debug_surface=screen)
+        ship_manager.draw_ships(screen, render_cache)
+        ship_manager.draw_ports(ports, screen, render_cache)
 
         if port_mode:
-            point = get_closest_coastpoint(coastlines)
+            point = get_closest_coastpoint(coastlines, coast_index)
             radius = capacities[capacity_index]
 
             circle_surf = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
@@ -252,63 +296,49 @@ def main():
             screen.blit(circle_surf, (point[0] - radius, point[1] - radius))
 
         if creating_order:
-            font = pygame.font.SysFont(None, 36)
-            text = font.render(f"{container_amount} container(s)", True, (255, 255, 255))
+            text = render_cache.text(f"{container_amount} container(s)", 36, (255, 255, 255))
             screen.blit(text, ((SCREEN_WIDTH // 2) - text.get_width(), (SCREEN_HEIGHT // 2) - text.get_height()))
 
         if show_graph:
-            route_manager.draw_graph(graph, screen)
+            layers.blit(screen, "graph")
+
+        # Poll results: progress reports carry the best layout so far, drawn while the swarm runs
+        while optimizing:
+            try:
+                kind, payload = optimize_result_queue.get_nowait()
+            except Empty:
+                break
+            if kind == "progress":
+                if payload["layout"][0] is not highway_nodes:  # the best layout changed
+                    highway_nodes, highway_edges, all_nodes_for_draw, order_paths_xy = payload["layout"]
+                    highway_version += 1
+                optimize_status = (f" {payload['iteration']}/{payload['iters']}, cost {payload['best_cost']:.0f}, "
+                                   f"{payload['evals_per_sec']:.0f} evals/s")
+                continue
+            optimizing = False
+            if kind == "failed":
+                print(f"[Highways] Optimization failed: {payload}")
+            elif payload is not None:
+                highway_nodes, highway_edges, best_cost, all_nodes_for_draw, order_paths_xy = payload
+                highway_version += 1
+                highway_store.add(*optimize_scenario, highway_nodes, best_cost)
+                print(f"[Highways] Optimization {'finished' if kind == 'done' else 'stopped'}: cost={best_cost:.2f}, "
+                      f"nodes={len(highway_nodes)}, edges={len(highway_edges)}")
 
         if show_route:
-            route_manager.draw_routes()
-
-            if highway_nodes is not None and all_nodes_for_draw is not None and highway_edges is not None:
-                for edge in highway_edges:
-                    u, v = edge
-                    start_pos = all_nodes_for_draw[u]
-                    end_pos = all_nodes_for_draw[v]
-                    pygame.draw.line(screen, (255, 255, 255), start_pos, end_pos, 3)
-
-                for node in highway_nodes:
-                    pygame.draw.circle(screen, (255, 255, 255), (int(node[0]), int(node[1])), 5)
-
-                if order_paths_xy is not None:
-                    for i, poly in enumerate(order_paths_xy):
-                        color = route_colors[i % len(route_colors)]
-                        for a, b in zip(poly, poly[1:]):
-                            pygame.draw.line(
-                                screen,
-                                color,
-                                (a[0], a[1]),
-                                (b[0], b[1]),
-                                5,
-                            )
+            layers.blit(screen, "routes", "highways")
 
         if optimizing:
-            font = pygame.font.SysFont(None, 24)
-            txt = font.render("Optimizing highways…", True, (255, 255, 255))
+            txt = render_cache.text(f"Optimizing highways…{optimize_status} (H to stop)", 24, (255, 255, 255))
             screen.blit(txt, (10, 10))
 
-        # Poll results
-        if optimizing:
-            try:
-                ok, payload = optimize_result_queue.get_nowait()
-                optimizing = False
-                if ok:
-                    highway_nodes, highway_edges, best_cost, all_nodes_for_draw, order_paths_xy = payload
-                    print(f"[Highways] Optimization finished: cost={best_cost:.2f}, nodes={len(highway_nodes)}, edges={len(highway_edges)}")
-                else:
-                    print(f"[Highways] Optimization failed: {payload}")
-            except Exception:
-                pass
-        
-
         # Draw the UI last so it stays visible
         manager.update(dt)
         manager.draw_ui(screen)
 
         pygame.display.flip()
         dt = clock.tick(60) / 1000  # limits FPS, dt is time since last frame
+    sim.close()
     pygame.quit()
 
 
@@ -0,0 +1,190 @@
+import argparse
+import glob
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from coastlines.distance_field import DistanceField
+from coastlines.svg_parser import svg_to_points
+from landmarks import LandmarkIndex
+from ocean_graph import OceanGraph
+from quadtree_graph import build_quadtree_graph
+from route_manager import RouteManager
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'maps')
+# Bump when the layout of the cached arrays, or what a builder produces for the same parameters, changes
+CACHE_FORMAT = 3
+
+
+def cache_file(cache_dir, svg_path, kind, *params):
+    """
+    Path of a cache entry for `svg_path`, keyed by the SVG contents and `params`.
+    Editing the SVG or changing any parameter gives a new key, so stale entries are never read.
+    """
+    with open(svg_path, 'rb') as f:
+        digest = hashlib.sha1(f.read())
+    digest.update(repr((CACHE_FORMAT, kind) + params).encode())
+    name, _ = os.path.splitext(os.path.basename(svg_path))
+    return os.path.join(cache_dir, f"{name}.{kind}-{digest.hexdigest()[:16]}.npz")
+
+
+def _save(path, compressed=False, **arrays):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so an interrupted run never leaves a truncated entry behind
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        (np.savez_compressed if compressed else np.savez)(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _load(path):
+    try:
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_coastlines(svg_path, step=1, scale=1.0, cache_dir=CACHE_DIR):
+    """`svg_to_points(svg_path, scale, step)`, read from the cache when possible. `cache_dir=None` disables caching."""
+    if cache_dir is None:
+        return svg_to_points(svg_path, scale=scale, step=step)
+    path = cache_file(cache_dir, svg_path, 'coastlines', step, scale)
+    data = _load(path) if os.path.exists(path) else None
+    if data is not None:
+        points = data['points'].tolist()
+        offsets = data['offsets'].tolist()
+        return [[tuple(p) for p in points[start:end]] for start, end in zip(offsets, offsets[1:])]
+
+    coastlines = svg_to_points(svg_path, scale=scale, step=step)
+    points = np.array([p for coastline in coastlines for p in coastline], dtype=float).reshape(-1, 2)
+    offsets = np.cumsum([0] + [len(coastline) for coastline in coastlines])
+    _save(path, points=points, offsets=offsets)
+    return coastlines
+
+
+def load_ocean_graph(svg_path, coastlines, width, height, grid_gap, min_dist, step=1, scale=1.0,
+                     cache_dir=CACHE_DIR):
+    """
+    `RouteManager.create_ocean_graph` for `coastlines` (as parsed from `svg_path` with
+    `step` and `scale`), read from the cache when possible. `cache_dir=None` disables caching.
+    """
+    if cache_dir is None:
+        return RouteManager(width, height, None).create_ocean_graph(coastlines, None, grid_gap, min_dist)
+    path = cache_file(cache_dir, svg_path, 'graph', step, scale, width, height, grid_gap, min_dist)
+    data = _load(path) if os.path.exists(path) else None
+    if data is not None:
+        return OceanGraph.from_arrays(data)
+
+    graph = RouteManager(width, height, None).create_ocean_graph(coastlines, None, grid_gap, min_dist)
+    _save(path, **graph.to_arrays())
+    return graph
+
+
+def load_quadtree_graph(svg_path, coastlines, width, height, min_cell, max_cell, min_dist, step=1, scale=1.0,
+                        cache_dir=CACHE_DIR, refine_points=(), refine_radius=0):
+    """`build_quadtree_graph` counterpart of `load_ocean_graph`"""
+    if cache_dir is None:
+        return build_quadtree_graph(coastlines, width, height, min_cell, max_cell, min_dist, refine_points,
+                                    refine_radius)
+    refine_points = [tuple(p) for p in refine_points]
+    path = cache_file(cache_dir, svg_path, 'quadtree', step, scale, width, height, min_cell, max_cell, min_dist,
+                      refine_points, refine_radius)
+    data = _load(path) if os.path.exists(path) else None
+    if data is not None:
+        return OceanGraph.from_arrays(data)
+
+    graph = build_quadtree_graph(coastlines, width, height, min_cell, max_cell, min_dist, refine_points,
+                                 refine_radius)
+    _save(path, **graph.to_arrays())
+    return graph
+
+
+def load_distance_field(svg_path, coastlines, width, height, resolution=2.0, step=1, scale=1.0, cache_dir=CACHE_DIR):
+    """`DistanceField.build` counterpart of `load_ocean_graph`"""
+    if cache_dir is None:
+        return DistanceField.build(coastlines, width, height, resolution)
+    path = cache_file(cache_dir, svg_path, 'sdf', step, scale, width, height, resolution)
+    data = _load(path) if os.path.exists(path) else None
+    if data is not None:
+        return DistanceField.from_arrays(data)
+
+    field = DistanceField.build(coastlines, width, height, resolution)
+    # Mostly smooth float grids, which compress to under half their size
+    _save(path, compressed=True, **field.to_arrays())
+    return field
+
+
+def graph_digest(graph: OceanGraph):
+    digest = hashlib.sha1()
+    for array in (graph.coords, graph.indptr, graph.indices, graph.weights):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def load_landmarks(svg_path, graph: OceanGraph, count=8, cache_dir=CACHE_DIR):
+    """
+    `LandmarkIndex.build(graph, count)` for a graph of the map at `svg_path`, cached under
+    a hash of the graph itself, so any change to the map or the graph parameters misses.
+    `cache_dir=None` disables caching.
+    """
+    if cache_dir is None:
+        return LandmarkIndex.build(graph, count)
+    path = cache_file(cache_dir, svg_path, 'landmarks', graph_digest(graph), count)
+    data = _load(path) if os.path.exists(path) else None
+    if data is not None:
+        return LandmarkIndex.from_arrays(data)
+
+    landmarks = LandmarkIndex.build(graph, count)
+    _save(path, **landmarks.to_arrays())
+    return landmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild the coastline, ocean graph, landmark and distance field "
+                                                 "caches for the maps")
+    parser.add_argument("maps", nargs="*", help="SVG maps (default: every map in coastlines/svg)")
+    parser.add_argument("--step", type=int, default=10)
+    parser.add_argument("--scale", type=float, default=1.2)
+    parser.add_argument("--size", type=int, nargs=2, default=(1280, 720), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--grid-gap", type=int, nargs="+", default=[20])
+    parser.add_argument("--min-dist", type=int, default=20)
+    parser.add_argument("--quadtree", type=int, nargs=2, metavar=("MIN_CELL", "MAX_CELL"),
+                        help="also build the quadtree ocean graph with these cell sizes")
+    parser.add_argument("--landmarks", type=int, default=0, help="also build an ALT index with this many landmarks")
+    parser.add_argument("--distance-field", type=float, metavar="RESOLUTION",
+                        help="also build the coastline distance field at this many px per cell")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="remove every cached entry first")
+    args = parser.parse_args()
+
+    if args.clear:
+        for path in glob.glob(os.path.join(args.cache_dir, '*.npz')):
+            os.remove(path)
+
+    maps = args.maps or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      'coastlines', 'svg', '*.svg')))
+    width, height = args.size
+    for svg_path in maps:
+        start = time.perf_counter()
+        coastlines = load_coastlines(svg_path, args.step, args.scale, args.cache_dir)
+        for grid_gap in args.grid_gap:
+            graph = load_ocean_graph(svg_path, coastlines, width, height, grid_gap, args.min_dist, args.step,
+                                     args.scale, args.cache_dir)
+            if args.landmarks:
+                load_landmarks(svg_path, graph, args.landmarks, args.cache_dir)
+        if args.quadtree:
+            graph = load_quadtree_graph(svg_path, coastlines, width, height, *args.quadtree, args.min_dist, args.step,
+                                        args.scale, args.cache_dir)
+            if args.landmarks:
+                load_landmarks(svg_path, graph, args.landmarks, args.cache_dir)
+        if args.distance_field:
+            load_distance_field(svg_path, coastlines, width, height, args.distance_field, args.step, args.scale,
+                                args.cache_dir)
+        print(f"{os.path.basename(svg_path)}: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
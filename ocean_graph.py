@@ -0,0 +1,74 @@
+import numpy as np
+
+from utils.nearest_index import NearestIndex
+
+
+class OceanGraph:
+    """
+    Ocean routing graph in compressed sparse row form.
+
+    Nodes are integer ids 0..N-1 with coordinates `coords[i]`. The neighbours
+    of node i are `indices[indptr[i]:indptr[i + 1]]`, and `weights` holds
+    the matching edge costs. Routing code works on ids only; `node_id` maps a
+    coordinate back to its id when one is needed.
+    """
+
+    def __init__(self, coords, indptr, indices, weights):
+        self.coords = np.ascontiguousarray(coords)
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self._ids = None
+        self._views = None
+        self._nearest = None
+
+    def __len__(self):
+        return len(self.coords)
+
+    @property
+    def nbytes(self):
+        return self.coords.nbytes + self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def coord(self, i):
+        """(x, y) of node `i`"""
+        x, y = self.coords[i].tolist()
+        return x, y
+
+    def path_coords(self, path):
+        """[(x, y), ...] for a list of node ids"""
+        return [(x, y) for x, y in self.coords[np.asarray(path, dtype=np.int64)].tolist()] if path else []
+
+    def node_id(self, point):
+        """Id of the node at `point`, or None. The lookup table is built on first use."""
+        if self._ids is None:
+            self._ids = {(x, y): i for i, (x, y) in enumerate(self.coords.tolist())}
+        return self._ids.get(tuple(point))
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def views(self):
+        """
+        (indptr, indices, weights) as memoryviews. Indexing these yields plain Python
+        numbers without per-element NumPy overhead, which is what search loops want.
+        """
+        if self._views is None:
+            self._views = memoryview(self.indptr), memoryview(self.indices), memoryview(self.weights)
+        return self._views
+
+    def closest_node(self, point):
+        """Id of the node closest to `point`, or None for an empty graph. The KD-tree is built on first use."""
+        if self._nearest is None:
+            self._nearest = NearestIndex(self.coords)
+        return self._nearest.nearest(point)
+
+    def to_arrays(self):
+        return {'coords': self.coords, 'indptr': self.indptr, 'indices': self.indices, 'weights': self.weights}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['coords'], arrays['indptr'], arrays['indices'], arrays['weights'])
@@ -25,7 +25,11 @@ class Port:
         # WARN: Linear running time in the amount of orders
         self.docked_ships.remove(ship)
 
-    def draw(self, surface):
+    def draw(self, surface, render_cache=None):
         pygame.draw.circle(surface, self.color, (self.x, self.y), self.radius)
-        text = pygame.font.SysFont(None, 24).render(f'{len(self.docked_ships)}/{self.capacity}', False, (0, 0, 0))
+        label = f'{len(self.docked_ships)}/{self.capacity}'
+        if render_cache is not None:
+            text = render_cache.text(label, 24, (0, 0, 0), antialias=False)
+        else:
+            text = pygame.font.SysFont(None, 24).render(label, False, (0, 0, 0))
         surface.blit(text, (self.x + 15, self.y - self.radius))
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ocean_graph import OceanGraph
+from utils.math_utils import points_on_land, polygon_edges
+
+
+def coast_samples(coastlines, spacing):
+    """Points every `spacing` px or closer along every polygon edge, closing edges included"""
+    a, b = polygon_edges(coastlines)
+    if len(a) == 0:
+        return np.empty((0, 2))
+    lengths = np.hypot(*(b - a).T)
+    counts = np.maximum(np.ceil(lengths / spacing).astype(int), 1)
+    edge = np.repeat(np.arange(len(a)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+    return a[edge] + (b[edge] - a[edge]) * t[:, None]
+
+
+def build_quadtree_graph(coastlines, width, height, min_cell=5, max_cell=160, min_dist=20,
+                         refine_points=(), refine_radius=0):
+    """
+    Multi-resolution ocean graph: a quadtree over the screen whose leaves are
+    `max_cell` px squares in open sea, halved down to `min_cell` px near the
+    coast, along the map edge and within `refine_radius` of any of `refine_points`.
+
+    The leaves tile the screen so that the centres of `min_cell` leaves fall on the
+    points of a create_ocean_graph grid with grid_gap `min_cell`. Every leaf that is
+    open water becomes a node at its centre. A leaf counts as water when its centre
+    is off land and at least `min_dist` from every coastline vertex, the grid's node
+    test. Two leaves are connected, weighted by the distance between their centres,
+    wherever the grid would connect a point in one to a point in the other (axis,
+    diagonal and knight moves), so both graphs have the same connected components.
+    Coarse leaves are only kept when the whole square is `min_dist` clear of the
+    coast. `max_cell` should be `min_cell` times a power of two.
+    """
+    spacing = min_cell / 2
+    samples = coast_samples(coastlines, spacing)
+    coast = cKDTree(samples) if len(samples) else None
+    vertices = [p for poly in coastlines for p in poly]
+    vertex_tree = cKDTree(np.array(vertices, dtype=float)) if vertices else None
+    refine = cKDTree(np.asarray(refine_points, dtype=float).reshape(-1, 2)) if len(refine_points) else None
+
+    # The tiled area, whose min_cell pixels are centred on the grid points min_cell .. width - min_cell
+    origin = min_cell / 2
+    right, bottom = width - origin, height - origin
+    xs = np.arange(origin, right, max_cell)
+    ys = np.arange(origin, bottom, max_cell)
+    gx, gy = np.meshgrid(xs, ys, indexing='ij')
+    cells = np.column_stack((gx.ravel(), gy.ravel())).astype(float)
+    size = float(max_cell)
+
+    leaves = []  # (x0, y0, size) of the water leaves
+    while len(cells):
+        centres = cells + size / 2
+        half_diagonal = size * math.sqrt(2) / 2
+        coast_dist = coast.query(centres)[0] if coast is not None else np.full(len(cells), np.inf)
+        # Coast samples can be up to spacing / 2 from the true coastline
+        clear = coast_dist - spacing / 2 > half_diagonal + min_dist
+        # Cells reaching past the tiled area are split until their parts fit, so the border strip is covered too
+        split = ~clear | (cells[:, 0] + size > right) | (cells[:, 1] + size > bottom)
+        if refine is not None:
+            split |= refine.query(centres)[0] < refine_radius + half_diagonal
+        if size / 2 < min_cell:
+            split[:] = False
+
+        leaf = ~split
+        # Same node test as the uniform grid: off land and min_dist from every coastline vertex
+        water = leaf & (clear | (vertex_tree.query(centres)[0] >= min_dist)) if vertex_tree is not None else leaf
+        if coastlines and water.any():
+            water[water] = ~points_on_land(centres[water], coastlines)
+        leaves.extend((x, y, size) for x, y in cells[water].tolist())
+
+        half = size / 2
+        parents = cells[split]
+        cells = np.concatenate([parents + (dx, dy) for dx in (0, half) for dy in (0, half)]) \
+            if len(parents) else np.empty((0, 2))
+        cells = cells[(cells[:, 0] < right) & (cells[:, 1] < bottom)]
+        size = half
+
+    return _leaves_to_graph(leaves, width, height, min_cell, origin)
+
+
+def _leaves_to_graph(leaves, width, height, min_cell, origin):
+    # Paint leaf ids onto a min_cell raster; pixels a grid move apart with different ids are adjacent leaves
+    cols = math.ceil(width / min_cell) + 1
+    rows = math.ceil(height / min_cell) + 1
+    labels = np.full((cols, rows), -1, dtype=np.int32)
+    coords = np.empty((len(leaves), 2))
+    for i, (x0, y0, size) in enumerate(leaves):
+        cx, cy = int(round((x0 - origin) / min_cell)), int(round((y0 - origin) / min_cell))
+        k = int(round(size / min_cell))
+        labels[cx:cx + k, cy:cy + k] = i
+        coords[i] = (x0 + size / 2, y0 + size / 2)
+
+    pairs = []
+    for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1), (2, 1), (1, 2), (2, -1), (1, -2)):
+        a = labels[max(0, -dx):cols - max(0, dx), max(0, -dy):rows - max(0, dy)]
+        b = labels[max(0, dx):cols - max(0, -dx), max(0, dy):rows - max(0, -dy)]
+        touching = (a >= 0) & (b >= 0) & (a != b)
+        pairs.append(np.column_stack((a[touching], b[touching])))
+    pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int32)
+    pairs = np.unique(np.concatenate((pairs, pairs[:, ::-1])), axis=0)  # both directions, sorted by source
+
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(pairs[:, 0], minlength=len(leaves)))))
+    delta = coords[pairs[:, 1]] - coords[pairs[:, 0]]
+    return OceanGraph(coords, indptr, pairs[:, 1], np.hypot(delta[:, 0], delta[:, 1]))
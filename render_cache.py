@@ -0,0 +1,53 @@
+import pygame
+
+from ship import SHIP_LENGTH, SHIP_WIDTH
+
+
+class RenderCache:
+    """
+    Reusable render resources for the draw path.
+
+    Ship sprites are rotated once per (color, angle bucket), with angles
+    quantized to `angle_step` degrees. Fonts are created once per (name, size)
+    and rendered text is reused until its content or style changes.
+    """
+
+    def __init__(self, angle_step=5, max_texts=512):
+        self.angle_step = angle_step
+        self.max_texts = max_texts
+        self.sprites = {}
+        self.fonts = {}
+        self.texts = {}
+
+    def quantize(self, angle_deg):
+        return round(angle_deg / self.angle_step) * self.angle_step % 360
+
+    def ship_sprite(self, color, angle_deg):
+        key = (color, self.quantize(angle_deg))
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            # Long axis along +X (nose to the right), as in Ship.draw
+            ship_surf = pygame.Surface((SHIP_LENGTH, SHIP_WIDTH), pygame.SRCALPHA)
+            pygame.draw.rect(ship_surf, color, ship_surf.get_rect())
+            sprite = pygame.transform.rotate(ship_surf, key[1])
+            self.sprites[key] = sprite
+        return sprite
+
+    def font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+        return font
+
+    def text(self, text, size, color, antialias=True, name=None):
+        key = (text, size, color, antialias, name)
+        surf = self.texts.get(key)
+        if surf is None:
+            if len(self.texts) >= self.max_texts:
+                # Labels change rarely, so dropping everything now and then is enough
+                self.texts.clear()
+            surf = self.font(size, name).render(text, antialias, color)
+            self.texts[key] = surf
+        return surf
@@ -0,0 +1,63 @@
+import pygame
+
+
+class Layer:
+    def __init__(self, draw, version, transparent):
+        self.draw = draw
+        self.version = version
+        self.transparent = transparent
+        self.surface = None
+        self.drawn_version = None
+        self.dirty = True
+
+
+class LayerCompositor:
+    """
+    Pre-renders static map layers to off-screen surfaces and blits them each frame.
+
+    A layer is redrawn only when it is invalidated or when its `version`
+    callable returns something new, e.g. after a port is added or a new
+    optimizer result arrives. Toggling layers just picks which ones to blit.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.layers = {}
+
+    def add_layer(self, name, draw, version=None, transparent=True):
+        """
+        draw: callable taking the layer surface and drawing the layer on it.
+        version: optional callable; the layer is redrawn whenever its value changes.
+        transparent: whether the layer is blitted over what is already on screen.
+        """
+        self.layers[name] = Layer(draw, version, transparent)
+
+    def invalidate(self, name=None):
+        for layer_name, layer in self.layers.items():
+            if name is None or layer_name == name:
+                layer.dirty = True
+
+    def _new_surface(self, transparent):
+        surface = pygame.Surface(self.size, pygame.SRCALPHA if transparent else 0)
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            # Match the display pixel format so blits don't convert every frame
+            surface = surface.convert_alpha() if transparent else surface.convert()
+        return surface
+
+    def render(self, name):
+        """Return the cached surface of layer `name`, redrawing it first if its inputs changed"""
+        layer = self.layers[name]
+        version = layer.version() if layer.version is not None else None
+        if layer.dirty or version != layer.drawn_version:
+            if layer.surface is None:
+                layer.surface = self._new_surface(layer.transparent)
+            if layer.transparent:
+                layer.surface.fill((0, 0, 0, 0))
+            layer.draw(layer.surface)
+            layer.drawn_version = version
+            layer.dirty = False
+        return layer.surface
+
+    def blit(self, screen, *names):
+        for name in names:
+            screen.blit(self.render(name), (0, 0))
@@ -1,31 +1,73 @@
 import heapq
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait
 from math import dist, inf
 
 import numpy as np
 import pygame
+from scipy.spatial import cKDTree
 
+from ocean_graph import OceanGraph
 from port import Port
-from utils.math_utils import point_in_polygon
+from utils.math_utils import points_on_land, polygon_edges, segments_intersect_edges
+
+
+class PortTree:
+    """
+    Shortest-path tree grown from a port's graph node. It stopped growing once
+    every node in `targets` was settled, so paths are only exact to those.
+    """
+
+    def __init__(self, source, targets, distances, edge_to):
+        self.source = source
+        self.targets = targets
+        self.distances = distances
+        self.edge_to = edge_to
+
+    def covers(self, node):
+        return node == self.source or node in self.targets
+
+    def path_to(self, node):
+        """Node ids from the port to `node`, or [] if it is unreachable"""
+        if self.distances[node] == inf:
+            return []
+        return RouteManager._path_to(self.edge_to, node)
 
 
 class RouteManager:
     def __init__(self, screen_width, screen_height, screen):
         self.routes = {}
+        # Shortest-path tree per port, for the graph in self.tree_graph
+        self.port_trees = {}
+        self.tree_graph = None
+        # Bumped whenever the routes change, so cached drawings of them can be refreshed
+        self.routes_version = 0
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.screen = screen
         self.splitting_cost = 50
         self.merging_cost = 30
         self.energy_cost_per_pixel = 0.01
+        # Default search used by get_port_route: "dijkstra", "astar", "alt" or "bidirectional"
+        self.route_search = "astar"
+        # Optional LandmarkIndex for the ocean graph, used by the "alt" search
+        self.landmarks = None
+        # Coastline edges and margin used to straighten routes, see enable_smoothing
+        self.smoothing_edges = None
+        self.route_clearance = 0.0
+        # Background route computation, see start_route_workers
+        self.route_pool = None
+        self.route_workers = None
+        self.pool_graph = None
+        self.pending_routes = []
+        self.removed_ports = set()
 
-    def draw_graph(self, graph: dict, screen):
-        for point in graph.keys():
+    def draw_graph(self, graph: OceanGraph, screen):
+        for point in graph.coords.tolist():
             pygame.draw.circle(screen, (0, 0, 0), point, 1)
 
-    def draw_route(self, route):
+    def draw_route(self, route, surface=None):
         for a, b in zip(route, route[1:]):
-            pygame.draw.line(self.screen, "red", a, b)
+            pygame.draw.line(surface or self.screen, "red", a, b)
 
     def find_optimal_routes(self, orders):
         pass
@@ -37,109 +79,498 @@ class RouteManager:
                     return True
         return False
 
-    def get_closest_point(self, p, lst):
-        min_dist = None
-        closest_point = None
-        for p2 in lst:
-            d = dist(p, p2)
-            if min_dist is None or d < min_dist:
-                min_dist = d
-                closest_point = p2
-        return closest_point
-
-    def get_port_route(self, port_a: Port, port_b: Port, graph, weight):
-        a = self.get_closest_point((port_a.x, port_a.y), graph.keys())
-        b = self.get_closest_point((port_b.x, port_b.y), graph.keys())
-        return self.dijkstra(graph, weight, a, b)[-1]
+    def shortest_path(self, graph: OceanGraph, s, t, method=None, stats=None):
+        """
+        Shortest path between node ids `s` and `t` with the search `method`
+        (default `self.route_search`). All methods return paths of the same cost.
+        """
+        search = {"dijkstra": self.dijkstra,
+                  "astar": self.astar,
+                  "alt": self.alt,
+                  "bidirectional": self.bidirectional_dijkstra}[method or self.route_search]
+        return search(graph, s, t, stats)
+
+    def get_port_route(self, port_a: Port, port_b: Port, graph: OceanGraph, method=None):
+        a = graph.closest_node((port_a.x, port_a.y))
+        b = graph.closest_node((port_b.x, port_b.y))
+        return graph.path_coords(self.shortest_path(graph, a, b, method)[-1])
 
     def create_ocean_graph(self, coastlines, screen, grid_gap, min_dist):
-        graph = defaultdict(list)
-        weight = {}
-        for x in range(0 + grid_gap, self.screen_width, grid_gap):
-            for y in range(0 + grid_gap, self.screen_height, grid_gap):
-                if not any([point_in_polygon((x, y), poly) or self.close_to_coastline((x, y), coastlines, min_dist) for poly in coastlines]):
-                    graph[(x, y)] = []
-
-        for x, y in graph.keys():
-            for x2, y2 in [(x - grid_gap, y),
-                           (x + grid_gap, y),
-                           (x, y - grid_gap),
-                           (x, y + grid_gap),
-                           (x - grid_gap, y - grid_gap),
-                           (x - grid_gap, y + grid_gap),
-                           (x + grid_gap, y + grid_gap),
-                           (x + grid_gap, y - grid_gap)]:
-                if (x2, y2) in graph.keys():
-                    graph[(x, y)].append((x2, y2))
-                    if x == x2 or y == y2:
-                        weight[(x, y), (x2, y2)] = grid_gap
-                    else:
-                        weight[(x, y), (x2, y2)] = np.sqrt(grid_gap ** 2 + grid_gap ** 2)
-            for x2, y2 in [(x - 2*grid_gap, y - grid_gap),
-                           (x - 2*grid_gap, y + grid_gap),
-                           (x + 2*grid_gap, y - grid_gap),
-                           (x + 2*grid_gap, y + grid_gap),
-                           (x - grid_gap, y - 2*grid_gap),
-                           (x + grid_gap, y - 2*grid_gap),
-                           (x - grid_gap, y + 2*grid_gap),
-                           (x + grid_gap, y + 2*grid_gap)]:
-                if (x2, y2) in graph.keys():
-                    graph[(x, y)].append((x2, y2))
-                    weight[(x, y), (x2, y2)] = np.sqrt((grid_gap*2) ** 2 + grid_gap ** 2)
-
-        return graph, weight
-
-    def dijkstra(self, graph, weight, s, t):
-        """
-        `graph`: an adjacency list (defaultdict(list))
-        `weight`: a dictionary where weight[(v, w)] is weight of the edge v -> w
-        """
-
-        pq = []
-        distances = defaultdict(lambda: inf)
+        """
+        Grid graph over open water: grid points that are not on land and not within
+        `min_dist` of a coastline vertex, each connected to its 16 neighbours
+        (axis, diagonal and knight moves) that are also in open water.
+
+        All grid points are classified at once with a vectorized land mask and a
+        KD-tree over the coastline vertices, and the edges come from shifted masks.
+        Nodes are numbered x-major, in the order of the grid loops.
+        """
+        xs = np.arange(grid_gap, self.screen_width, grid_gap)
+        ys = np.arange(grid_gap, self.screen_height, grid_gap)
+        gx, gy = np.meshgrid(xs, ys, indexing='ij')
+        points = np.column_stack((gx.ravel(), gy.ravel()))
+
+        water = np.ones(len(points), dtype=bool)
+        vertices = [p for poly in coastlines for p in poly]
+        if vertices:
+            water &= ~points_on_land(points, coastlines)
+            closest, _ = cKDTree(np.array(vertices, dtype=float)).query(points)
+            water &= ~(closest < min_dist)
+        water = water.reshape(gx.shape)
+
+        straight = grid_gap
+        diagonal = np.sqrt(grid_gap ** 2 + grid_gap ** 2)
+        knight = np.sqrt((grid_gap*2) ** 2 + grid_gap ** 2)
+        # Neighbour offsets in grid steps, in the order the adjacency lists are built
+        offsets = [((-1, 0), straight), ((1, 0), straight), ((0, -1), straight), ((0, 1), straight),
+                   ((-1, -1), diagonal), ((-1, 1), diagonal), ((1, 1), diagonal), ((1, -1), diagonal),
+                   ((-2, -1), knight), ((-2, 1), knight), ((2, -1), knight), ((2, 1), knight),
+                   ((-1, -2), knight), ((1, -2), knight), ((-1, 2), knight), ((1, 2), knight)]
+
+        ix, iy = np.nonzero(water)  # row-major, i.e. x-major like the grid loops
+        ids = np.full(water.shape, -1, dtype=np.int32)
+        ids[ix, iy] = np.arange(len(ix))
+
+        neighbor_ids = np.full((len(ix), len(offsets)), -1, dtype=np.int32)
+        for k, ((dx, dy), _) in enumerate(offsets):
+            nx, ny = ix + dx, iy + dy
+            inside = (nx >= 0) & (nx < water.shape[0]) & (ny >= 0) & (ny < water.shape[1])
+            neighbor_ids[inside, k] = ids[nx[inside], ny[inside]]
+
+        present = neighbor_ids >= 0
+        indptr = np.concatenate(([0], np.cumsum(present.sum(axis=1))))
+        offset_weights = np.array([w for _, w in offsets], dtype=np.float64)
+        weights = np.broadcast_to(offset_weights, present.shape)[present]
+        return OceanGraph(np.column_stack((xs[ix], ys[iy])), indptr, neighbor_ids[present], weights)
+
+    def dijkstra(self, graph: OceanGraph, s, t, stats=None):
+        """
+        Shortest path between node ids `s` and `t`.
+        Returns (distance, [node ids from s to t]), or (None, []) if `t` is unreachable.
+        If given, `stats["expanded"]` receives the number of nodes expanded.
+        """
+        indptr, indices, weights = graph.views()
+        distances = [inf] * len(graph)
         distances[s] = 0
-        heapq.heappush(pq, (0, s))
-        edge_to = defaultdict(lambda: None)
+        edge_to = [-1] * len(graph)
+        pq = [(0, s)]
+        expanded = 0
 
         while pq:
             current_dist, node = heapq.heappop(pq)
 
             if node == t:
-
-                # Construct path
-                path = []
-                while node:
-                    path.append(node)
-                    node = edge_to[node]
-                return current_dist, path[::-1]
+                if stats is not None:
+                    stats["expanded"] = expanded
+                return current_dist, self._path_to(edge_to, node)
 
             if current_dist > distances[node]:
                 continue
+            expanded += 1
 
             # Update distances for neighbors
-            for neighbor in graph[node]:
-                if (node, neighbor) not in weight:
-                    print(f"Error: Missing weight for edge {node} -> {neighbor}")
-                    continue
-                neighbor_dist = current_dist + weight[(node, neighbor)]
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[k]
+                neighbor_dist = current_dist + weights[k]
 
                 if neighbor_dist < distances[neighbor]:
                     distances[neighbor] = neighbor_dist
                     edge_to[neighbor] = node
                     heapq.heappush(pq, (neighbor_dist, neighbor))
 
+        if stats is not None:
+            stats["expanded"] = expanded
         return None, []
 
-    def generate_routes(self, ports, graph, weights):
-        routes = {}
-        for i in range(len(ports)):
-            for j in range(i + 1, len(ports)):
-                a, b = ports[i], ports[j]
-                route = [(a.x, a.y)] + self.get_port_route(a, b, graph, weights) + [(b.x, b.y)]
-                routes[(b, a)] = route  # Store as reversed routes because of ship logic
-                routes[(a, b)] = route[::-1]
-        self.routes = routes
-
-    def draw_routes(self):
+    def astar(self, graph: OceanGraph, s, t, stats=None):
+        """
+        A* search between node ids `s` and `t`, same interface as `dijkstra`.
+
+        The heuristic is the straight-line distance to `t`. Every edge weighs its
+        Euclidean length, so it never overestimates and the path cost matches `dijkstra`.
+        """
+        return self._astar(graph, s, t, self._straight_line(graph, t).tolist(), stats)
+
+    def alt(self, graph: OceanGraph, s, t, stats=None):
+        """
+        A* guided by `self.landmarks` (a LandmarkIndex for `graph`), same interface as
+        `dijkstra`. Falls back to plain `astar` when no landmarks are loaded.
+        """
+        if self.landmarks is None:
+            return self.astar(graph, s, t, stats)
+        heuristic = np.maximum(self._straight_line(graph, t), self.landmarks.heuristic(t))
+        if heuristic[s] == inf:
+            # The landmarks already tell s and t are not connected
+            if stats is not None:
+                stats["expanded"] = 0
+            return None, []
+        return self._astar(graph, s, t, heuristic.tolist(), stats)
+
+    @staticmethod
+    def _straight_line(graph: OceanGraph, t):
+        tx, ty = graph.coords[t]
+        return np.hypot(graph.coords[:, 0] - tx, graph.coords[:, 1] - ty)
+
+    def _astar(self, graph: OceanGraph, s, t, heuristic, stats):
+        indptr, indices, weights = graph.views()
+        distances = [inf] * len(graph)
+        distances[s] = 0
+        edge_to = [-1] * len(graph)
+        pq = [(heuristic[s], 0, s)]
+        expanded = 0
+
+        while pq:
+            _, current_dist, node = heapq.heappop(pq)
+
+            if node == t:
+                if stats is not None:
+                    stats["expanded"] = expanded
+                return current_dist, self._path_to(edge_to, node)
+
+            if current_dist > distances[node]:
+                continue
+            expanded += 1
+
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[k]
+                neighbor_dist = current_dist + weights[k]
+
+                if neighbor_dist < distances[neighbor]:
+                    distances[neighbor] = neighbor_dist
+                    edge_to[neighbor] = node
+                    heapq.heappush(pq, (neighbor_dist + heuristic[neighbor], neighbor_dist, neighbor))
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        return None, []
+
+    def bidirectional_dijkstra(self, graph: OceanGraph, s, t, stats=None):
+        """
+        Dijkstra run from both `s` and `t` until the frontiers meet, same interface as `dijkstra`.
+        Relies on the ocean graph being undirected, which it is: every edge is added both ways.
+
+        Each step expands the side with the smaller queue, which keeps the two searches about
+        the same size; between coastal ports they expand about two thirds of the nodes
+        `dijkstra` does. `astar` expands far fewer still and stays the default.
+        """
+        if s == t:
+            if stats is not None:
+                stats["expanded"] = 0
+            return 0, [s]
+        indptr, indices, weights = graph.views()
+        n = len(graph)
+        forward, backward = [inf] * n, [inf] * n
+        forward_to, backward_to = [-1] * n, [-1] * n
+        forward[s] = backward[t] = 0
+        forward_pq, backward_pq = [(0, s)], [(0, t)]
+        best, meeting = inf, -1
+        expanded = 0
+
+        while forward_pq and backward_pq:
+            # Stop once no path through either frontier can beat the best meeting point
+            if forward_pq[0][0] + backward_pq[0][0] >= best:
+                break
+            if len(forward_pq) <= len(backward_pq):
+                dist, other, edge_to, pq = forward, backward, forward_to, forward_pq
+            else:
+                dist, other, edge_to, pq = backward, forward, backward_to, backward_pq
+            current_dist, node = heapq.heappop(pq)
+            if current_dist > dist[node]:
+                continue
+            expanded += 1
+
+            start, end = indptr[node], indptr[node + 1]
+            for neighbor, weight in zip(indices[start:end], weights[start:end]):
+                neighbor_dist = current_dist + weight
+
+                if neighbor_dist < dist[neighbor]:
+                    dist[neighbor] = neighbor_dist
+                    edge_to[neighbor] = node
+                    heapq.heappush(pq, (neighbor_dist, neighbor))
+                    # Whichever side labels a node last sees both of its distances
+                    if neighbor_dist + other[neighbor] < best:
+                        best = neighbor_dist + other[neighbor]
+                        meeting = neighbor
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        if meeting == -1:
+            return None, []
+        # Forward half s..meeting, then the backward tree read from meeting back to t
+        path = self._path_to(forward_to, meeting)
+        node = backward_to[meeting]
+        while node != -1:
+            path.append(node)
+            node = backward_to[node]
+        return best, path
+
+    def shortest_path_tree(self, graph: OceanGraph, s, targets=None):
+        """
+        Dijkstra from node id `s` over the whole graph, or until every node id in
+        `targets` is settled. Returns (distances, edge_to) lists indexed by node id;
+        nodes not reached keep distance inf and predecessor -1.
+        """
+        indptr, indices, weights = graph.views()
+        distances = [inf] * len(graph)
+        distances[s] = 0
+        edge_to = [-1] * len(graph)
+        remaining = set(targets) if targets is not None else None
+        pq = [(0, s)]
+
+        while pq:
+            current_dist, node = heapq.heappop(pq)
+            if current_dist > distances[node]:
+                continue
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[k]
+                neighbor_dist = current_dist + weights[k]
+
+                if neighbor_dist < distances[neighbor]:
+                    distances[neighbor] = neighbor_dist
+                    edge_to[neighbor] = node
+                    heapq.heappush(pq, (neighbor_dist, neighbor))
+
+        return distances, edge_to
+
+    @staticmethod
+    def _path_to(edge_to, node):
+        path = []
+        while node != -1:
+            path.append(node)
+            node = edge_to[node]
+        return path[::-1]
+
+    def port_tree(self, port: Port, ports, graph: OceanGraph):
+        """
+        Shortest-path tree from `port`, grown until every other port in `ports` is settled.
+        Trees are kept per port and reused while they cover the ports asked for.
+        """
+        if graph is not self.tree_graph:
+            self.port_trees = {}
+            self.tree_graph = graph
+        targets = {graph.closest_node((p.x, p.y)) for p in ports if p is not port}
+        tree = self.port_trees.get(port)
+        if tree is None or not all(tree.covers(node) for node in targets):
+            source = graph.closest_node((port.x, port.y))
+            distances, edge_to = self.shortest_path_tree(graph, source, targets)
+            tree = PortTree(source, targets, distances, edge_to)
+            self.port_trees[port] = tree
+        return tree
+
+    def port_route(self, port_a: Port, port_b: Port, graph: OceanGraph):
+        """
+        Graph path from `port_a` to `port_b` read from the stored trees: `port_a`'s tree
+        if it covers `port_b`, else `port_b`'s tree reversed, else a regrown `port_a` tree.
+        With landmarks loaded and the "alt" search selected, it is a direct ALT query instead.
+        """
+        if self._landmark_routes():
+            return self.get_port_route(port_a, port_b, graph, "alt")
+        b = graph.closest_node((port_b.x, port_b.y))
+        tree_a = self.port_trees.get(port_a) if graph is self.tree_graph else None
+        if tree_a is None or not tree_a.covers(b):
+            a = graph.closest_node((port_a.x, port_a.y))
+            tree_b = self.port_trees.get(port_b) if graph is self.tree_graph else None
+            if tree_b is not None and tree_b.covers(a):
+                return graph.path_coords(tree_b.path_to(a))[::-1]
+            tree_a = self.port_tree(port_a, [port_b], graph)
+        return graph.path_coords(tree_a.path_to(b))
+
+    def enable_smoothing(self, coastlines, clearance=0.0):
+        """
+        Straighten the routes stored from now on: waypoints are skipped wherever the
+        straight shortcut stays more than `clearance` px away from every coastline.
+        """
+        self.smoothing_edges = polygon_edges(coastlines)
+        self.route_clearance = clearance
+
+    def clear_shortcuts(self, p, targets):
+        """Whether the straight shortcut from `p` to each of `targets` keeps its clearance from the coast"""
+        a, b = self.smoothing_edges
+        starts = np.broadcast_to(np.asarray(p, dtype=float), (len(targets), 2))
+        return ~segments_intersect_edges(starts, targets, a, b, clearance=self.route_clearance)
+
+    def smooth_path(self, path):
+        """
+        String-pull `path`, a list of points: from each kept waypoint, jump to the furthest
+        later waypoint that a clear shortcut reaches. The first and last waypoints are kept.
+        Returns `path` unchanged unless smoothing is enabled.
+        """
+        if self.smoothing_edges is None or len(path) < 3:
+            return path
+        smoothed = [path[0]]
+        i = 0
+        while i < len(path) - 1:
+            # Test every shortcut from here at once; the jump ends before the first blocked one
+            clear = self.clear_shortcuts(path[i], path[i + 2:])
+            j = i + 1 + (int(np.argmin(clear)) if not clear.all() else len(clear))
+            smoothed.append(path[j])
+            i = j
+        return smoothed
+
+    def _landmark_routes(self):
+        # ALT answers a port pair in a few hundred expansions, cheaper than growing a tree per port
+        return self.landmarks is not None and self.route_search == "alt"
+
+    def paths_from(self, graph: OceanGraph, source, targets):
+        """
+        Smoothed graph paths from point `source` to each point in `targets`, from one
+        shortest-path tree (or ALT queries when landmarks are in use). Used by route workers.
+        """
+        s = graph.closest_node(source)
+        nodes = [graph.closest_node(t) for t in targets]
+        if self._landmark_routes():
+            paths = [self.shortest_path(graph, s, t, "alt")[1] for t in nodes]
+        else:
+            distances, edge_to = self.shortest_path_tree(graph, s, set(nodes))
+            tree = PortTree(s, set(nodes), distances, edge_to)
+            paths = [tree.path_to(t) for t in nodes]
+        return [self.smooth_path(graph.path_coords(path)) for path in paths]
+
+    def _set_route(self, a: Port, b: Port, graph: OceanGraph):
+        self._store_route(a, b, self.smooth_path(self.port_route(a, b, graph)))
+
+    def _store_route(self, a: Port, b: Port, path):
+        """Store the route from `a` to `b` along the graph path `path`, in both directions"""
+        route = [(a.x, a.y)] + path + [(b.x, b.y)]
+        self.routes[(b, a)] = route  # Store as reversed routes because of ship logic
+        self.routes[(a, b)] = route[::-1]
+
+    def generate_routes(self, ports, graph: OceanGraph):
+        """
+        Recompute the routes between every pair of `ports`: one shortest-path tree
+        per port, each read for the routes to the ports after it.
+        """
+        self.port_trees = {}
+        self.tree_graph = graph
+        # Update in place so holders of self.routes see the new routes
+        self.routes.clear()
+        for i, a in enumerate(ports):
+            if not self._landmark_routes():
+                self.port_tree(a, ports, graph)
+            for b in ports[i + 1:]:
+                self._set_route(a, b, graph)
+        self.routes_version += 1
+
+    def add_port(self, port: Port, ports, graph: OceanGraph):
+        """
+        Add the routes between `port` and every other port in `ports`, keeping the
+        existing routes. A single shortest-path tree from the new port covers them all.
+        """
+        if not self._landmark_routes():
+            self.port_tree(port, ports, graph)
+        for other in ports:
+            if other is not port:
+                # Same layout as generate_routes with `other` placed before `port`
+                self._set_route(other, port, graph)
+        self.routes_version += 1
+
+    def remove_port(self, port: Port):
+        """Drop every route to or from `port`"""
+        for key in [key for key in self.routes if port in key]:
+            del self.routes[key]
+        self.port_trees.pop(port, None)
+        if self.pending_routes:
+            # Routes for it may still be on their way from the workers
+            self.removed_ports.add(port)
+        self.routes_version += 1
+
+    def start_route_workers(self, graph: OceanGraph, workers=None):
+        """
+        Start a process pool that computes routes on `graph` in the background, for
+        generate_routes_async and add_port_async. The graph and the current smoothing,
+        landmark and search settings are sent to each worker once, when it starts.
+        """
+        from route_workers import init_route_worker
+
+        self.stop_route_workers()
+        landmarks = self.landmarks.to_arrays() if self.landmarks is not None else None
+        self.route_pool = ProcessPoolExecutor(workers, initializer=init_route_worker,
+                                              initargs=(graph.to_arrays(), self.smoothing_edges, self.route_clearance,
+                                                        landmarks, self.route_search))
+        self.route_workers = workers
+        self.pool_graph = graph
+
+    def stop_route_workers(self):
+        if self.route_pool is not None:
+            self.route_pool.shutdown(wait=False, cancel_futures=True)
+            self.route_pool = None
+        self.pending_routes = []
+        self.removed_ports.clear()
+
+    def _submit_routes(self, source: Port, targets, graph: OceanGraph, source_first):
+        from route_workers import paths_task
+
+        if graph is not self.pool_graph:
+            self.start_route_workers(graph, self.route_workers)
+        future = self.route_pool.submit(paths_task, (source.x, source.y), [(p.x, p.y) for p in targets])
+        self.pending_routes.append((future, source, targets, source_first))
+
+    def generate_routes_async(self, ports, graph: OceanGraph):
+        """
+        generate_routes on the route workers. The current routes are dropped now and
+        the new ones arrive through poll_routes, one departure port at a time.
+        """
+        for future, *_ in self.pending_routes:
+            future.cancel()
+        self.pending_routes = []
+        self.removed_ports.clear()
+        self.routes.clear()
+        self.routes_version += 1
+        for i, a in enumerate(ports):
+            if ports[i + 1:]:
+                self._submit_routes(a, ports[i + 1:], graph, source_first=True)
+
+    def add_port_async(self, port: Port, ports, graph: OceanGraph):
+        """add_port on the route workers; the new routes arrive through poll_routes"""
+        others = [p for p in ports if p is not port]
+        if others:
+            self._submit_routes(port, others, graph, source_first=False)
+
+    @property
+    def routes_pending(self):
+        return bool(self.pending_routes)
+
+    def wait_for_routes(self):
+        """Block until the workers have finished every pending route, then store them"""
+        wait([future for future, *_ in self.pending_routes])
+        return self.poll_routes()
+
+    def poll_routes(self):
+        """Store the routes the workers have finished so far. Returns the number of port pairs added."""
+        done = [entry for entry in self.pending_routes if entry[0].done()]
+        if not done:
+            return 0
+        self.pending_routes = [entry for entry in self.pending_routes if not entry[0].done()]
+
+        added = 0
+        for future, source, targets, source_first in done:
+            if future.cancelled():
+                continue
+            try:
+                paths = future.result()
+            except Exception as e:
+                print(f"[Routes] Route worker failed: {e}")
+                continue
+            for target, path in zip(targets, paths):
+                if source in self.removed_ports or target in self.removed_ports:
+                    continue
+                if source_first:
+                    self._store_route(source, target, path)
+                else:
+                    # Same layout as add_port: the other port comes before the new one
+                    self._store_route(target, source, path[::-1])
+                added += 1
+        if not self.pending_routes:
+            self.removed_ports.clear()
+        if added:
+            self.routes_version += 1
+        return added
+
+    def draw_routes(self, surface=None):
         for r in self.routes.values():
-            self.draw_route(r)
+            self.draw_route(r, surface)
@@ -0,0 +1,24 @@
+from landmarks import LandmarkIndex
+from ocean_graph import OceanGraph
+from route_manager import RouteManager
+
+# Routing state of a worker process, set once by init_route_worker
+_route_manager = None
+_graph = None
+
+
+def init_route_worker(graph_arrays, smoothing_edges, route_clearance, landmark_arrays, route_search):
+    """Pool initializer: rebuild the ocean graph and routing settings in this process"""
+    global _route_manager, _graph
+    _graph = OceanGraph.from_arrays(graph_arrays)
+    _route_manager = RouteManager(0, 0, None)
+    _route_manager.smoothing_edges = smoothing_edges
+    _route_manager.route_clearance = route_clearance
+    if landmark_arrays is not None:
+        _route_manager.landmarks = LandmarkIndex.from_arrays(landmark_arrays)
+    _route_manager.route_search = route_search
+
+
+def paths_task(source, targets):
+    """Graph paths from point `source` to every point in `targets`"""
+    return _route_manager.paths_from(_graph, source, targets)
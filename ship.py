@@ -1,10 +1,11 @@
 import pygame
 import math
-import time
 import random
 
 from reynold import separation, cohesion, alignment, kelvin_cohesion, line_cohesion
 import route
+from coastlines.segment_index import iter_segments
+from sim_clock import WALL_CLOCK
 from utils.math_utils import line_intersection, line_from_points, point_in_segment, distance, vector_dot_product
 
 TURN_FACTOR = .1
@@ -20,6 +21,8 @@ SHIP_LENGTH = 10
 SEPARATION_DISTANCE = 15
 ALIGNMENT_DISTANCE = 80
 COHESION_DISTANCE = 80
+# Largest radius flocking looks at, used to size neighbor queries
+NEIGHBOR_DISTANCE = max(SEPARATION_DISTANCE, ALIGNMENT_DISTANCE, COHESION_DISTANCE)
 
 SEPARATION_FACTOR = 0.01
 ALIGNMENT_FACTOR = 0.0001
@@ -66,7 +69,7 @@ def is_point_inside_segment(line_p1, line_p2, p3):
 
 
 class Ship:
-    def __init__(self, x, y, route=None):
+    def __init__(self, x, y, route=None, clock=None):
         self.x = x
         self.y = y
         self.vx = -1
@@ -75,18 +78,23 @@ class Ship:
         self.destination = None
         self.departure = None
         self.line_follow = False
-        self.line_follow_timeout = time.time()
+        # Line following timers use this clock; ShipManager replaces it with its own
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.line_follow_timeout = self.clock.now()
 
     def set_route(self, route):
         self.route = route.copy()
 
+    def set_clock(self, clock):
+        if clock is self.clock:
+            return
+        # Carry the remaining line follow time over to the new clock
+        self.line_follow_timeout = clock.now() + (self.line_follow_timeout - self.clock.now())
+        self.clock = clock
+
     # Draw the ship at its current position and orientation
-    def draw(self, surface, debug_draw=False):
-        # Create a ship surface with the long axis along +X (nose to the right)
-        ship_surf = pygame.Surface((SHIP_LENGTH, SHIP_WIDTH), pygame.SRCALPHA)
-        # Draw the ship rect, get.rect() to fill the entire surface
+    def draw(self, surface, debug_draw=False, render_cache=None):
         color = "red" if self.line_follow and debug_draw else "black"
-        pygame.draw.rect(ship_surf, color, ship_surf.get_rect())
 
         # Compute angle so the nose points along velocity (screen coords: y increases downward)
         if self.vx == 0 and self.vy == 0:
@@ -94,8 +102,16 @@ class Ship:
         else:
             angle_deg = math.degrees(math.atan2(-self.vy, self.vx))
 
-        # Rotate and blit centered at (self.x, self.y)
-        rotated = pygame.transform.rotate(ship_surf, angle_deg)
+        if render_cache is not None:
+            rotated = render_cache.ship_sprite(color, angle_deg)
+        else:
+            # Create a ship surface with the long axis along +X (nose to the right)
+            ship_surf = pygame.Surface((SHIP_LENGTH, SHIP_WIDTH), pygame.SRCALPHA)
+            # Draw the ship rect, get.rect() to fill the entire surface
+            pygame.draw.rect(ship_surf, color, ship_surf.get_rect())
+            rotated = pygame.transform.rotate(ship_surf, angle_deg)
+
+        # Blit centered at (self.x, self.y)
         rotated_rect = rotated.get_rect(center=(self.x, self.y))
         surface.blit(rotated, rotated_rect.topleft)
 
@@ -119,7 +135,7 @@ class Ship:
         self.line_follow = True
         self.line_follow_timeout = timeout
 
-    def line_follow_check(self, coastlines, surface=None):
+    def line_follow_check(self, coastlines, surface=None, segment_index=None):
         if self.line_follow:
             return
 
@@ -140,25 +156,29 @@ class Ship:
         coastline_right_close = False
         coastline_left_close = False
 
-        for coastline in coastlines:
-            for p1, p2 in zip(coastline, coastline[1:]):
-                line_a, line_b = line_from_points(p1, p2)
+        if segment_index is not None:
+            segments = segment_index.query(self.x, self.y, LINE_FOLLOW_COASTLINE_THRESHOLD)
+        else:
+            segments = iter_segments(coastlines)
 
-                intersection = line_intersection(a_r, b_r, line_a, line_b)
+        for p1, p2 in segments:
+            line_a, line_b = line_from_points(p1, p2)
 
-                if distance((self.x, self.y), intersection) > LINE_FOLLOW_COASTLINE_THRESHOLD:
-                    continue
-                
-                if not point_in_segment(intersection, p1, p2):
-                    continue
-                
-                if vector_dot_product((intersection[0] - self.x, intersection[1] - self.y), (sensor_global_x - self.x, sensor_global_y - self.y)) > 0:
-                    coastline_right_close = True
-                else:
-                    coastline_left_close = True
+            intersection = line_intersection(a_r, b_r, line_a, line_b)
+
+            if distance((self.x, self.y), intersection) > LINE_FOLLOW_COASTLINE_THRESHOLD:
+                continue
+
+            if not point_in_segment(intersection, p1, p2):
+                continue
+
+            if vector_dot_product((intersection[0] - self.x, intersection[1] - self.y), (sensor_global_x - self.x, sensor_global_y - self.y)) > 0:
+                coastline_right_close = True
+            else:
+                coastline_left_close = True
 
         if coastline_right_close and coastline_left_close:
-            self.start_line_following(time.time() + LINE_FOLLOW_TIME)
+            self.start_line_following(self.clock.now() + LINE_FOLLOW_TIME)
 
     def flocking(self, ships, surface=None):
         separation_neighbors = []
@@ -203,7 +223,8 @@ class Ship:
         #     self.vx += (cohesion_vector[0] - self.x) * COHESION_FACTOR
         #     self.vy += (cohesion_vector[1] - self.y) * COHESION_FACTOR
 
-        if self.line_follow and time.time() < self.line_follow_timeout:
+        now = self.clock.now()
+        if self.line_follow and now < self.line_follow_timeout:
             # Notify neighbors to also line follow
             for neighbor in cohesion_neighbors:
                 if not neighbor.line_follow:
@@ -213,7 +234,7 @@ class Ship:
                 self.vx += (line_vector[0] - self.x) * COHESION_FACTOR
                 self.vy += (line_vector[1] - self.y) * COHESION_FACTOR
         else:
-            if time.time() >= self.line_follow_timeout:
+            if now >= self.line_follow_timeout:
                 self.line_follow = False
 
             if kelvin_vector is not None:
@@ -245,48 +266,58 @@ class Ship:
 
     # Move ship, avoiding coastlines
 
-    def move(self, ships, coastlines, surface=None):
+    def move(self, ships, coastlines, surface=None, segment_index=None, distance_field=None):
         vx = 0
         vy = 0
-        for coastline in coastlines:
-            for p1, p2 in zip(coastline, coastline[1:]):
-                c_line = line_from_points(p1, p2)
-
-                point = closest_point(c_line, (self.x, self.y))
-                x, y = point
-
-                # Check if point inside coastline
-                if x < min(p1[0], p2[0]):
-                    if p1[0] < p2[0]:
-                        x = p1[0]
-                        y = p1[1]
-                    else:
-                        x = p2[0]
-                        y = p2[1]
-                elif x > max(p1[0], p2[0]):
-                    if p1[0] > p2[0]:
-                        x = p1[0]
-                        y = p1[1]
-                    else:
-                        x = p2[0]
-                        y = p2[1]
-
-                point = x, y
-
-                # Check if too far away
-                if distance(point, (self.x, self.y)) > RANGE:
-                    continue
-
-                if surface is not None:
-                    pygame.draw.circle(surface, "red", point, 3)
-
-                if surface is not None:
-                    pygame.draw.line(surface, "red", p1, p2)
-                    pygame.draw.line(surface, "white", (self.x, self.y), point)
-
-                # Steer away from coastline
-                vx += self.x - x
-                vy += self.y - y
+        if distance_field is not None:
+            # Push down the distance field gradient instead of summing over nearby segments
+            d, vx, vy = distance_field.sample(self.x, self.y)
+            if d > RANGE:
+                vx, vy = 0, 0
+            segments = ()
+        elif segment_index is not None:
+            segments = segment_index.query(self.x, self.y, RANGE)
+        else:
+            segments = iter_segments(coastlines)
+
+        for p1, p2 in segments:
+            c_line = line_from_points(p1, p2)
+
+            point = closest_point(c_line, (self.x, self.y))
+            x, y = point
+
+            # Check if point inside coastline
+            if x < min(p1[0], p2[0]):
+                if p1[0] < p2[0]:
+                    x = p1[0]
+                    y = p1[1]
+                else:
+                    x = p2[0]
+                    y = p2[1]
+            elif x > max(p1[0], p2[0]):
+                if p1[0] > p2[0]:
+                    x = p1[0]
+                    y = p1[1]
+                else:
+                    x = p2[0]
+                    y = p2[1]
+
+            point = x, y
+
+            # Check if too far away
+            if distance(point, (self.x, self.y)) > RANGE:
+                continue
+
+            if surface is not None:
+                pygame.draw.circle(surface, "red", point, 3)
+
+            if surface is not None:
+                pygame.draw.line(surface, "red", p1, p2)
+                pygame.draw.line(surface, "white", (self.x, self.y), point)
+
+            # Steer away from coastline
+            vx += self.x - x
+            vy += self.y - y
 
         # NOTE: This is here because it is weird that further away gives stronger force
         # This gives constant force
@@ -1,7 +1,10 @@
+from fleet import Fleet
 from route import Route
-from ship import Ship
+from sim_clock import WALL_CLOCK
+from ship import Ship, NEIGHBOR_DISTANCE
 import random
 from utils.math_utils import point_in_polygon
+from utils.spatial_grid import SpatialGrid
 
 def spawn_not_in_coastlines(coastlines, w, h, margin=0, max_attempts=1000):
         """Return a random (x,y) not inside any coastline. Falls back to center if none found."""
@@ -15,35 +18,57 @@ def spawn_not_in_coastlines(coastlines, w, h, margin=0, max_attempts=1000):
         return w // 2, h // 2
 
 class ShipManager:
-    def __init__(self, screen_size, screen, routes):
+    def __init__(self, screen_size, screen, routes, backend="python", clock=None):
+        '''
+        backend: "python" updates ships one at a time, "vectorized" steps the
+        whole fleet with batched array operations (see fleet.Fleet).
+        clock: time source for ship timers, shared with every managed ship.
+        Defaults to the wall clock; simulation.Simulation passes its SimulationClock.
+        '''
+        self.clock = clock if clock is not None else WALL_CLOCK
         self.screen_size = screen_size
         self.ships = []
         self.show_ship_sensors = True
         self.screen = screen
         self.send_ships_immidiately = True
+        # Cell size matches the flocking radius so neighbor queries only touch 3x3 cells
+        self.ship_grid = SpatialGrid(NEIGHBOR_DISTANCE)
+        self.fleet = Fleet() if backend == "vectorized" else None
 
     def get_route_between(self, routes, departure_port, destination_port):
         return routes.get((departure_port, destination_port))
 
     def add_ship(self, ship: Ship):
+        ship.set_clock(self.clock)
         self.ships.append(ship)
+        self.ship_grid.insert(ship, ship.x, ship.y)
+        if self.fleet is not None:
+            self.fleet.add(ship)
 
     def remove_ship(self, ship: Ship):
         # WARN: Linear running time in the amount of ships
         if ship in self.ships:
             self.ships.remove(ship)
+            self.ship_grid.remove(ship)
+            if self.fleet is not None:
+                self.fleet.remove(ship)
+
+    def nearby_ships(self, x, y, radius):
+        """Candidate ships within `radius` of (x, y); callers check exact distances"""
+        return self.ship_grid.query(x, y, radius)
 
     def spawn_random_ships(self, coastlines):
         route = None
         for _ in range(20):
             x, y = spawn_not_in_coastlines(coastlines, self.screen_size[0], self.screen_size[1], margin=50, max_attempts=2000)
-            self.ships.append(Ship(x, y, route[1:-1].copy() if route else None))
+            self.add_ship(Ship(x, y, route[1:-1].copy() if route else None))
 
     def undock_ship(self, ship, route, destination, departure):
         ship.undock(Route(route, departure, destination))
         self.add_ship(ship)
 
     def dock_ship(self, port, ship):
+        ship.set_clock(self.clock)
         ship.dock(port)
         self.remove_ship(ship)
         port.add_docked_ship(ship)
@@ -51,21 +76,41 @@ class ShipManager:
     def send_off_ships(self, routes, port):
         for order in list(port.orders):
             route = self.get_route_between(routes, port, order.destination)
-            if len(port.docked_ships) < order.containers:
+            if route is None or len(port.docked_ships) < order.containers:
+                # No route yet, e.g. still being computed in the background
                 continue
             for _ in range(order.containers):
                 ship = port.docked_ships.pop(0)
                 self.undock_ship(ship, route, order.destination, port)
             port.remove_order(order)
 
-    def update_ships(self, coastlines):
+    def update_ships(self, coastlines, segment_index=None, distance_field=None, debug_surface=None):
+        '''
+        Advance every ship by one tick. Nothing is drawn, except ship sensors on
+        `debug_surface` when it is given and sensors are toggled on.
+
+        segment_index: optional coastlines.segment_index.SegmentIndex over `coastlines`,
+        so ships only look at nearby coastline segments.
+        distance_field: optional coastlines.distance_field.DistanceField, replaces the
+        per-segment coastline repulsion with a lookup.
+        '''
+        w, h = self.screen_size
+        if self.fleet is not None:
+            self.fleet.step(coastlines, w, h, self.clock.now(), segment_index, distance_field)
+            self.ship_grid.rebuild(self.ships)
+            return
+
+        surface = debug_surface if self.show_ship_sensors else None
+        self.ship_grid.rebuild(self.ships)
         for ship in self.ships:
-            ship.boundary_update(1280, 720)
-            ship.line_follow_check(coastlines, surface=self.screen if self.show_ship_sensors else None)
-            ship.flocking(self.ships, surface=self.screen if self.show_ship_sensors else None)
-            ship.follow_route(surface=self.screen if self.show_ship_sensors else None)
-            ship.move(self.ships, coastlines, surface=self.screen if self.show_ship_sensors else None)
-            ship.draw(self.screen)
+            ship.boundary_update(w, h)
+            ship.line_follow_check(coastlines, surface=surface, segment_index=segment_index)
+            neighbors = self.nearby_ships(ship.x, ship.y, NEIGHBOR_DISTANCE)
+            ship.flocking(neighbors, surface=surface)
+            ship.follow_route(surface=surface)
+            ship.move(neighbors, coastlines, surface=surface, segment_index=segment_index, distance_field=distance_field)
+            # Keep the grid exact for the ships updated after this one
+            self.ship_grid.move(ship, ship.x, ship.y)
 
     def update_ports(self, ports, routes):
         for port in ports:
@@ -73,11 +118,20 @@ class ShipManager:
             if self.send_ships_immidiately:
                 # TODO: fix this
                 self.send_off_ships(routes, port)
-            port.draw(self.screen)
+
+    def draw_ships(self, surface=None, render_cache=None):
+        surface = surface or self.screen
+        for ship in self.ships:
+            ship.draw(surface, render_cache=render_cache)
+
+    def draw_ports(self, ports, surface=None, render_cache=None):
+        surface = surface or self.screen
+        for port in ports:
+            port.draw(surface, render_cache=render_cache)
 
     def dock_nearby_ships_to_destination_dock(self, port):
         padding = 15
-        for ship in self.ships:
+        for ship in self.nearby_ships(port.x, port.y, port.radius + padding):
             if ship.destination is None:  # Ignore ships that do not have a route - this is irrelevant for us, we don't want this
                 continue
             dist = ((ship.x - port.x) ** 2 + (ship.y - port.y) ** 2) ** 0.5
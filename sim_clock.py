@@ -0,0 +1,31 @@
+import time
+
+
+class SimulationClock:
+    """
+    Simulated time, advanced explicitly once per tick.
+
+    Ship timers read this instead of the wall clock, so a run behaves the same
+    whether it is rendered at 60 FPS, slowed down by load or fast-forwarded.
+    """
+
+    def __init__(self, tick=1 / 60):
+        self.tick = tick
+        self.ticks = 0
+
+    def now(self):
+        """Simulated seconds since the clock started"""
+        return self.ticks * self.tick
+
+    def advance(self, ticks=1):
+        self.ticks += ticks
+
+
+class WallClock:
+    """Real time, for ships and managers that are not driven by a simulation"""
+
+    def now(self):
+        return time.time()
+
+
+WALL_CLOCK = WallClock()
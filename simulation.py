@@ -0,0 +1,139 @@
+import argparse
+import random
+import time
+
+from coastlines.segment_index import SegmentIndex
+from map_cache import (CACHE_DIR, load_coastlines, load_distance_field, load_landmarks, load_ocean_graph,
+                       load_quadtree_graph)
+from port import Port
+from route_manager import RouteManager
+from ship import Ship
+from ship_manager import ShipManager
+from sim_clock import SimulationClock
+from utils.nearest_index import coastline_index
+from utils.order_utils import get_hard_coded_ports_and_orders
+
+# Simulated seconds per tick
+TICK = 1 / 60
+
+
+class Simulation:
+    """
+    Headless simulation engine.
+
+    Owns the coastlines, ocean graph, routes, ships and ports and advances them
+    by fixed ticks without touching the display, so it can run as fast as the
+    CPU allows. Front ends read its state to render it.
+    """
+
+    def __init__(self, width, height, map_path, map_step=10, map_scale=1.2, grid_gap=20, min_dist=20,
+                 ship_backend="python", use_distance_field=False, distance_field_resolution=2.0,
+                 map_cache_dir=CACHE_DIR, route_clearance=None, landmarks=0, ocean_graph="grid",
+                 quadtree_cells=(5, 160), quadtree_refine_radius=40, port_sites=(), route_workers=0):
+        self.width = width
+        self.height = height
+        self.clock = SimulationClock(TICK)
+
+        self.coastlines = load_coastlines(map_path, map_step, map_scale, map_cache_dir)
+        self.segment_index = SegmentIndex(self.coastlines)
+        # Nearest coastline vertex lookups, e.g. for snapping new ports to the coast
+        self.coast_index = coastline_index(self.coastlines)
+        self.distance_field = None
+        if use_distance_field:
+            self.distance_field = load_distance_field(map_path, self.coastlines, width, height,
+                                                      distance_field_resolution, map_step, map_scale, map_cache_dir)
+
+        self.route_manager = RouteManager(width, height, None)
+        if route_clearance is not None:
+            self.route_manager.enable_smoothing(self.coastlines, route_clearance)
+        if ocean_graph == "quadtree":
+            # Coarse cells in open sea, quadtree_cells[0] px cells along the coast and within
+            # quadtree_refine_radius of the port_sites, the (x, y) of the ports known up front
+            self.graph = load_quadtree_graph(map_path, self.coastlines, width, height, *quadtree_cells, min_dist,
+                                             map_step, map_scale, map_cache_dir, port_sites, quadtree_refine_radius)
+        else:
+            self.graph = load_ocean_graph(map_path, self.coastlines, width, height, grid_gap, min_dist, map_step,
+                                          map_scale, map_cache_dir)
+        if landmarks:
+            # ALT index for fast pairwise route queries on large graphs
+            self.route_manager.landmarks = load_landmarks(map_path, self.graph, landmarks, map_cache_dir)
+            self.route_manager.route_search = "alt"
+        if route_workers:
+            # Routes for new ports are computed in worker processes and picked up in step()
+            self.route_manager.start_route_workers(self.graph, route_workers)
+        self.ship_manager = ShipManager((width, height), None, self.route_manager.routes, backend=ship_backend,
+                                        clock=self.clock)
+        self.ports = []
+
+    @property
+    def tick(self):
+        return self.clock.ticks
+
+    @property
+    def time(self):
+        """Simulated seconds since the start"""
+        return self.clock.now()
+
+    def add_port(self, port: Port, ships=5):
+        """Add a port with `ships` docked ships and routes to the other ports"""
+        for _ in range(ships):
+            self.ship_manager.dock_ship(port, Ship(port.x, port.y, clock=self.clock))
+        self.ports.append(port)
+        if self.route_manager.route_pool is not None:
+            self.route_manager.add_port_async(port, self.ports, self.graph)
+        else:
+            self.route_manager.add_port(port, self.ports, self.graph)
+
+    def step(self, debug_surface=None):
+        """Advance one tick. `debug_surface` optionally receives ship sensor drawings."""
+        self.route_manager.poll_routes()
+        self.ship_manager.update_ships(self.coastlines, self.segment_index, self.distance_field,
+                                       debug_surface=debug_surface)
+        self.ship_manager.update_ports(self.ports, self.route_manager.routes)
+        self.clock.advance()
+
+    def run(self, ticks):
+        for _ in range(ticks):
+            self.step()
+
+    def close(self):
+        """Stop the route workers, if any"""
+        self.route_manager.stop_route_workers()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the simulation headless on the hard-coded scenario")
+    parser.add_argument("--ticks", type=int, default=3600)
+    parser.add_argument("--map", default="coastlines/svg/islands.svg")
+    parser.add_argument("--backend", choices=["python", "vectorized"], default="python")
+    parser.add_argument("--distance-field", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--graph", choices=["grid", "quadtree"], default="grid")
+    parser.add_argument("--landmarks", type=int, default=0, help="route with an ALT index of this many landmarks")
+    parser.add_argument("--route-workers", type=int, default=0, help="compute routes in this many processes")
+    parser.add_argument("--route-clearance", type=float, default=None,
+                        help="straighten routes, keeping shortcuts this many px from the coast")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    ports = get_hard_coded_ports_and_orders()
+    sim = Simulation(1280, 720, args.map, ship_backend=args.backend, use_distance_field=args.distance_field,
+                     route_clearance=args.route_clearance, landmarks=args.landmarks,
+                     ocean_graph=args.graph, port_sites=[(port.x, port.y) for port in ports],
+                     route_workers=args.route_workers)
+    for port in ports:
+        sim.add_port(port)
+    # Time the simulation only, not the route computation
+    sim.route_manager.wait_for_routes()
+
+    start = time.perf_counter()
+    sim.run(args.ticks)
+    elapsed = time.perf_counter() - start
+    sim.close()
+    print(f"{args.ticks} ticks ({sim.time:.1f} simulated s) in {elapsed:.2f} s: {args.ticks / elapsed:.1f} ticks/s, "
+          f"{len(sim.ship_manager.ships)} ships at sea")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import math
 import random
+import numpy as np
 import pygame
 
 EPS = 1e-9
@@ -38,8 +39,38 @@ def point_in_polygon(point, poly):
         j = i
     return inside
 
-def get_closest_coastpoint(coastlines):
+def points_in_polygon(points, poly):
+    """Vectorized point_in_polygon for an (n, 2) array of points"""
+    points = np.asarray(points, dtype=float)
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    n = len(poly)
+    j = n - 1
+    for i in range(n):
+        xi, yi = poly[i]
+        xj, yj = poly[j]
+        intersect = ((yi > y) != (yj > y)) & (x < (xj - xi) * (y - yi) / (yj - yi + 1e-12) + xi)
+        inside ^= intersect
+        j = i
+    return inside
+
+
+def points_on_land(points, polygons):
+    """Vectorized point_on_land for an (n, 2) array of points"""
+    on_land = np.zeros(len(points), dtype=bool)
+    for poly in polygons:
+        on_land |= points_in_polygon(points, poly)
+    return on_land
+
+def get_closest_coastpoint(coastlines, index=None):
+    """
+    Coastline vertex closest to the mouse. `index` is an optional
+    NearestIndex over the same vertices (see coastline_index) to avoid the scan.
+    """
     x, y = pygame.mouse.get_pos()
+    if index is not None and len(index):
+        px, py = index.points[index.nearest((x, y))].tolist()
+        return px, py
     closest_point = (0, 0)
     min_dist = float('inf')
     for coastline in coastlines:
@@ -92,6 +123,91 @@ def segment_intersects_any_polygon(p, q, polygons):
     return False
 
 
+def polygon_edges(polygons):
+    """(a, b) arrays of shape (K, 2) with every polygon edge, closing edges included"""
+    a = [p for poly in polygons for p in poly]
+    b = [p for poly in polygons for p in poly[1:] + poly[:1]]
+    if not a:
+        return np.empty((0, 2)), np.empty((0, 2))
+    return np.array(a, dtype=float), np.array(b, dtype=float)
+
+
+def points_to_segments_distance(points, a, b):
+    """Distance from each of the (n, 2) `points` to the matching segment a[i]-b[i]"""
+    ab = b - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    t = np.clip(np.einsum('ij,ij->i', points - a, ab) / np.where(length2 > 0, length2, 1), 0, 1)
+    closest = a + ab * t[:, None]
+    return np.hypot(points[:, 0] - closest[:, 0], points[:, 1] - closest[:, 1])
+
+
+def _orient_many(u, v, w):
+    """orient for arrays of points, row by row"""
+    return (v[..., 0] - u[..., 0]) * (w[..., 1] - u[..., 1]) - (v[..., 1] - u[..., 1]) * (w[..., 0] - u[..., 0])
+
+
+def _on_segment_many(a, b, c):
+    """on_segment for arrays of points, row by row"""
+    return ((np.minimum(a[:, 0], b[:, 0]) - 1e-9 <= c[:, 0]) & (c[:, 0] <= np.maximum(a[:, 0], b[:, 0]) + EPS) &
+            (np.minimum(a[:, 1], b[:, 1]) - 1e-9 <= c[:, 1]) & (c[:, 1] <= np.maximum(a[:, 1], b[:, 1]) + EPS))
+
+
+def _segments_intersect_many(p1, p2, q1, q2, eps=EPS):
+    """segments_intersect for arrays of segments, row by row"""
+    o1, o2 = _orient_many(p1, p2, q1), _orient_many(p1, p2, q2)
+    o3, o4 = _orient_many(q1, q2, p1), _orient_many(q1, q2, p2)
+    touching = ((np.abs(o1) < eps) & _on_segment_many(p1, p2, q1) |
+                (np.abs(o2) < eps) & _on_segment_many(p1, p2, q2) |
+                (np.abs(o3) < eps) & _on_segment_many(q1, q2, p1) |
+                (np.abs(o4) < eps) & _on_segment_many(q1, q2, p2))
+    return ~touching & (o1 * o2 < -eps) & (o3 * o4 < -eps)
+
+
+def segments_intersect_edges(p, q, a, b, clearance=None, eps=EPS, max_pairs=1 << 18):
+    """
+    Which of the segments p[i]-q[i] cross any of the segments a[k]-b[k], such as
+    the coastline edges from polygon_edges, as a boolean array. Crossings are
+    decided as segments_intersect does. With a `clearance`, segments that come
+    within that distance of an edge count as well.
+
+    Pairs whose bounding boxes are more than `clearance` apart are dropped
+    first; the rest are tested together, at most `max_pairs` candidates at a time.
+    """
+    p = np.asarray(p, dtype=float).reshape(-1, 2)
+    q = np.asarray(q, dtype=float).reshape(-1, 2)
+    hits = np.zeros(len(p), dtype=bool)
+    if len(p) == 0 or len(a) == 0:
+        return hits
+
+    margin = 0.0 if clearance is None else clearance
+    lo, hi = np.minimum(p, q) - margin, np.maximum(p, q) + margin
+    edge_lo, edge_hi = np.minimum(a, b), np.maximum(a, b)
+    chunk = max(1, max_pairs // len(a))
+    for start in range(0, len(p), chunk):
+        end = start + chunk
+        near = ((lo[start:end, None, 0] <= edge_hi[None, :, 0]) & (hi[start:end, None, 0] >= edge_lo[None, :, 0]) &
+                (lo[start:end, None, 1] <= edge_hi[None, :, 1]) & (hi[start:end, None, 1] >= edge_lo[None, :, 1]))
+        segment, edge = np.nonzero(near)
+        if len(segment) == 0:
+            continue
+        segment += start
+        ps, qs, edge_a, edge_b = p[segment], q[segment], a[edge], b[edge]
+        hit = _segments_intersect_many(ps, qs, edge_a, edge_b, eps)
+        if clearance is not None:
+            distance = np.minimum.reduce([points_to_segments_distance(edge_a, ps, qs),
+                                          points_to_segments_distance(edge_b, ps, qs),
+                                          points_to_segments_distance(ps, edge_a, edge_b),
+                                          points_to_segments_distance(qs, edge_a, edge_b)])
+            hit |= distance <= clearance
+        hits[segment[hit]] = True
+    return hits
+
+
+def segments_intersect_any_polygon(p, q, polygons):
+    """segment_intersects_any_polygon for the arrays of segments p[i]-q[i]"""
+    return segments_intersect_edges(p, q, *polygon_edges(polygons))
+
+
 def line_intersection(a1: int, b1: int, a2: int, b2: int) -> (int, int):
     """Find intersection point between two lines"""
     x = (b2 - b1) / (a1 - a2 + EPS)
@@ -0,0 +1,35 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class NearestIndex:
+    """
+    KD-tree over a fixed set of 2D points for nearest-point queries.
+
+    Built once, e.g. over the ocean graph nodes or the coastline vertices,
+    so snapping a point costs O(log n) instead of a scan over every point.
+    """
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.tree = cKDTree(self.points) if len(self.points) else None
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, point):
+        """Index of the point closest to `point`, or None if the index is empty"""
+        if self.tree is None:
+            return None
+        _, i = self.tree.query(point)
+        return int(i)
+
+    def nearest_many(self, points):
+        """Indices of the closest point for each row of an (n, 2) array"""
+        _, indices = self.tree.query(np.asarray(points, dtype=float).reshape(-1, 2))
+        return indices
+
+
+def coastline_index(coastlines):
+    """NearestIndex over every coastline vertex, in coastline order"""
+    return NearestIndex([p for coastline in coastlines for p in coastline])
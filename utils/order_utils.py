@@ -1,5 +1,6 @@
 import random
 from order import Order
+from port import Port
 from ship import Ship
 
 
@@ -14,3 +15,31 @@ def add_random_orders(ports, ship_manager, max_containers_per_order=4):
         for _ in range(number_of_containers):
             ship = Ship(port.x, port.y)
             ship_manager.dock_ship(port, ship)
+
+
+def get_hard_coded_ports_and_orders():
+    port1 = Port(330.3, 168.0, capacity=20)
+    port2 = Port(321.588, 321.012, capacity=20)
+    port3 = Port(759.288, 371.712, capacity=20)
+    order1 = Order(destination=port3, containers=3)
+    order2 = Order(destination=port3, containers=3)
+    port1.add_order(order1)
+    port2.add_order(order2)
+
+    return [port1, port2, port3]
+
+
+def collect_ports_and_orders(ports):
+    '''
+    returns pair of:
+    ports_xy: List of (x,y) tuples
+    orders: List of (origin_index, dest_index, containers)
+    '''
+    ports_xy = [(port.x, port.y) for port in ports]
+    orders = []
+    for origin_index, port in enumerate(ports):
+        for order in port.orders:
+            dest_index = ports.index(order.destination)
+            orders.append((origin_index, dest_index, order.containers))
+
+    return ports_xy, orders
@@ -0,0 +1,65 @@
+import math
+from collections import defaultdict
+
+
+class SpatialGrid:
+    """
+    Uniform grid bucketing items by position, for radius queries.
+
+    Queries with a radius no larger than `cell_size` only touch the 3x3 block
+    of cells around the query point.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.cell_of = {}
+
+    def cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def clear(self):
+        self.cells.clear()
+        self.cell_of.clear()
+
+    def insert(self, item, x, y):
+        key = self.cell(x, y)
+        self.cells[key].append(item)
+        self.cell_of[item] = key
+
+    def remove(self, item):
+        key = self.cell_of.pop(item, None)
+        if key is None:
+            return
+        bucket = self.cells[key]
+        bucket.remove(item)
+        if not bucket:
+            del self.cells[key]
+
+    def move(self, item, x, y):
+        key = self.cell(x, y)
+        if self.cell_of.get(item) == key:
+            return
+        self.remove(item)
+        self.insert(item, x, y)
+
+    def rebuild(self, items):
+        """Re-bucket all `items` by their current `x`, `y` attributes"""
+        self.clear()
+        for item in items:
+            self.insert(item, item.x, item.y)
+
+    def query(self, x, y, radius):
+        """
+        Return candidate items in the cells overlapping the square of half-size
+        `radius` around (x, y). Callers still check the exact distance.
+        """
+        cx0, cy0 = self.cell(x - radius, y - radius)
+        cx1, cy1 = self.cell(x + radius, y + radius)
+        candidates = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    candidates.extend(bucket)
+        return candidates